@@ -3,12 +3,19 @@ import os
 from flask import Flask
 from flask_session import Session
 from redis import StrictRedis
+from redis.cluster import RedisCluster
 from sqlalchemy import text
 
+from src import instrumentation
 from src.db import db, migrate
 from src.login import login
 from src.routes import routes
 
+REDIS_HOST = os.getenv("REDIS_HOST", "cache")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+# sessions live in a redis cluster rather than a single redis, see the scoreboard's cache.py
+REDIS_CLUSTER_MODE = os.getenv("REDIS_CLUSTER_MODE", "false").lower() == "true"
+
 
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY")
@@ -20,10 +27,10 @@ class Config:
     SESSION_PERMANENT = False
     SESSION_USE_SIGNER = True
     SESSION_SERIALIZATION_FORMAT = "json"
-    SESSION_REDIS = StrictRedis(
-        host=os.getenv("REDIS_HOST", "cache"),
-        port=6379,
-        db=0,
+    SESSION_REDIS = (
+        RedisCluster(host=REDIS_HOST, port=REDIS_PORT)
+        if REDIS_CLUSTER_MODE
+        else StrictRedis(host=REDIS_HOST, port=REDIS_PORT, db=0)
     )
 
 
@@ -31,6 +38,8 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    instrumentation.init_app(app)
+
     login.init_app(app)
     login.login_view = "routes.login"
 
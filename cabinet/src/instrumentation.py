@@ -0,0 +1,90 @@
+import time
+from contextvars import ContextVar
+from typing import Any
+from urllib.parse import urlparse
+
+import requests
+from flask import Flask, g, request
+from opentelemetry import metrics
+
+# per call site (the endpoint a request was routed to) calls out to the other arcade services and
+# their latency. calls made while handling a request are collected on the request and reported
+# when it finishes, labelled with its call site, alongside how many calls the request made in
+# total -- n+1 access patterns show up as call sites with a high call count.
+_meter = metrics.get_meter("cabinet.instrumentation")
+
+_http_duration_histogram = _meter.create_histogram(
+    name="arcade.http.client.duration",
+    unit="ms",
+    description="latency of a call to another arcade service by call site",
+)
+_http_calls_histogram = _meter.create_histogram(
+    name="arcade.http.client.calls",
+    description="calls to other arcade services made to handle a single request by call site",
+)
+
+
+class _CallSiteStats:
+    def __init__(self, call_site: str) -> None:
+        self.call_site = call_site
+        self.http_calls: list[tuple[dict[str, Any], float]] = []
+
+
+_call_site_stats: ContextVar[_CallSiteStats | None] = ContextVar("call_site_stats", default=None)
+
+
+def init_app(app: Flask) -> None:
+    @app.before_request
+    def _start_call_site() -> None:
+        g.call_site_token = _call_site_stats.set(
+            _CallSiteStats(call_site=request.endpoint or "unknown")
+        )
+
+    @app.teardown_request
+    def _finish_call_site(_: BaseException | None) -> None:
+        token = g.pop("call_site_token", None)
+        if token is None:
+            return
+
+        stats = _call_site_stats.get()
+        _call_site_stats.reset(token)
+
+        for attributes, duration in stats.http_calls:
+            _http_duration_histogram.record(
+                amount=duration, attributes={**attributes, "call_site": stats.call_site}
+            )
+
+        _http_calls_histogram.record(
+            amount=len(stats.http_calls), attributes={"call_site": stats.call_site}
+        )
+
+
+def http_request(method: str, url: str, **kwargs) -> requests.Response:
+    attributes = {"target": urlparse(url).hostname or "unknown", "method": method}
+
+    start = time.perf_counter()
+    try:
+        response = requests.request(method, url, **kwargs)
+        attributes["status_code"] = response.status_code
+        return response
+    except Exception:
+        attributes["status_code"] = "error"
+        raise
+    finally:
+        duration = (time.perf_counter() - start) * 1000
+
+        stats = _call_site_stats.get()
+        if stats is None:
+            _http_duration_histogram.record(
+                amount=duration, attributes={**attributes, "call_site": "background"}
+            )
+        else:
+            stats.http_calls.append((attributes, duration))
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    return http_request("GET", url, **kwargs)
+
+
+def http_post(url: str, **kwargs) -> requests.Response:
+    return http_request("POST", url, **kwargs)
@@ -3,12 +3,12 @@ import os
 import random
 import uuid
 
-import requests
 from flask import Blueprint, jsonify, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 from opentelemetry import trace
 
 from src.db import db
+from src.instrumentation import http_get, http_post
 from src.login import login
 from src.models import User
 
@@ -123,7 +123,7 @@ def record_game_score():
     # if imvaders is on "slow" version (<1), trigger some failed http reqs
     if content["title"] == "imvaders" and content["version"] == IMVADERS_SLOW_VERSION:
         try:
-            ret = requests.post(
+            ret = http_post(
                 f"http://{SCOREBOARD_HOST}/blackhole_sun",
                 json=content,
             )
@@ -136,7 +136,7 @@ def record_game_score():
         # recorded!!
         return {}
 
-    ret = requests.post(
+    ret = http_post(
         f"http://{SCOREBOARD_HOST}/record_game_score/",
         json=content,
     )
@@ -148,7 +148,7 @@ def record_game_score():
 
 @routes.route("/question/<string:module>", methods=["GET"])
 def get_question(module: str):
-    content = requests.get(
+    content = http_get(
         f"http://{PLAYER_CONTENT_HOST}/quiz/question/{module}",
         headers={
             "Player-Name": PLAYER_NAME,
@@ -169,14 +169,19 @@ def get_question(module: str):
 def record_answer():
     content = request.get_json(force=True)
 
-    ret = requests.post(
+    ret = http_post(
         f"http://{SCOREBOARD_HOST}/record_quiz_score/",
         json=content,
     )
 
     print(f"record quiz score status {ret.status_code}")
 
-    return {}
+    if not ret.ok:
+        return {}
+
+    # the scoreboard answers with the player's progression and whatever this answer unlocked, so
+    # the front end can update right away instead of waiting on the next progression poll
+    return ret.json()
 
 
 @routes.route("/record_question_thumbs_up_down", methods=["POST"])
@@ -184,7 +189,7 @@ def record_question_thumbs_up_down():
     # we'll have the js just send {"question": "the question prompt as this is unique enough to id"}
     content = request.get_json(force=True)
 
-    ret = requests.post(
+    ret = http_post(
         f"http://{SCOREBOARD_HOST}/record_question_thumbs_up_down",
         headers={
             "Player-Name": PLAYER_NAME,
@@ -199,7 +204,7 @@ def record_question_thumbs_up_down():
 
 @routes.route("/reset_quiz_scores", methods=["POST"])
 def reset_quiz_scores():
-    ret = requests.post(
+    ret = http_post(
         f"http://{SCOREBOARD_HOST}/reset_player_quiz_scores",
         headers={
             "Player-Name": PLAYER_NAME,
@@ -213,7 +218,7 @@ def reset_quiz_scores():
 
 @routes.route("/walkthrough/<string:module>/<string:stage>", methods=["GET"])
 def get_walkthrough(module: str, stage: str):
-    content = requests.get(f"http://{PLAYER_CONTENT_HOST}/walkthrough/{module}/{stage}")
+    content = http_get(f"http://{PLAYER_CONTENT_HOST}/walkthrough/{module}/{stage}")
 
     if content.status_code == UNPROCESSABLE_ENTITY:
         # signal to the front end that they ran out of content
@@ -224,7 +229,7 @@ def get_walkthrough(module: str, stage: str):
 
 @routes.route("/progression", methods=["GET"])
 def get_progression():
-    ret = requests.get(
+    ret = http_get(
         f"http://{SCOREBOARD_HOST}/player_progression",
         headers={
             "Player-Name": PLAYER_NAME,
@@ -236,7 +241,7 @@ def get_progression():
 
 @routes.route("/imvaders_version", methods=["GET"])
 def get_imvaders_version():
-    ret = requests.get(
+    ret = http_get(
         f"http://{SCOREBOARD_HOST}/player_progression",
         headers={
             "Player-Name": PLAYER_NAME,
@@ -248,7 +253,7 @@ def get_imvaders_version():
 
 @routes.route("/get_logger_shrink_state", methods=["GET"])
 def get_logger_shrink_state():
-    ret = requests.get(
+    ret = http_get(
         f"http://{SCOREBOARD_HOST}/player_progression",
         headers={
             "Player-Name": PLAYER_NAME,
@@ -2,4 +2,4 @@
 
 set -euxo pipefail
 
-python app.py
\ No newline at end of file
+splunk-py-trace python app.py
\ No newline at end of file
@@ -0,0 +1,139 @@
+import functools
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from typing import Any
+from urllib.parse import urlparse
+
+import requests
+from opentelemetry import metrics
+from redis import StrictRedis
+from redis.cluster import RedisCluster
+
+# per call site (the route a request was handled by) redis round trips and calls out to the other
+# arcade services, and their latency. everything done while handling a request is collected on the
+# request and reported when it finishes, labelled with its call site, alongside how many round
+# trips/calls the request made in total -- n+1 access patterns show up as call sites with a high
+# count.
+_meter = metrics.get_meter("player_content.instrumentation")
+
+_redis_duration_histogram = _meter.create_histogram(
+    name="arcade.redis.client.duration",
+    unit="ms",
+    description="latency of a redis round trip by call site",
+)
+_redis_round_trips_histogram = _meter.create_histogram(
+    name="arcade.redis.client.round_trips",
+    description="redis round trips made to handle a single request by call site",
+)
+_http_duration_histogram = _meter.create_histogram(
+    name="arcade.http.client.duration",
+    unit="ms",
+    description="latency of a call to another arcade service by call site",
+)
+_http_calls_histogram = _meter.create_histogram(
+    name="arcade.http.client.calls",
+    description="calls to other arcade services made to handle a single request by call site",
+)
+
+
+class _CallSiteStats:
+    def __init__(self, call_site: str) -> None:
+        self.call_site = call_site
+        self.redis_round_trips: list[tuple[dict[str, Any], float]] = []
+        self.http_calls: list[tuple[dict[str, Any], float]] = []
+
+
+_call_site_stats: ContextVar[_CallSiteStats | None] = ContextVar("call_site_stats", default=None)
+
+
+def _finish_call_site(stats: _CallSiteStats) -> None:
+    call_site = {"call_site": stats.call_site}
+
+    for attributes, duration in stats.redis_round_trips:
+        _redis_duration_histogram.record(amount=duration, attributes={**attributes, **call_site})
+
+    for attributes, duration in stats.http_calls:
+        _http_duration_histogram.record(amount=duration, attributes={**attributes, **call_site})
+
+    _redis_round_trips_histogram.record(amount=len(stats.redis_round_trips), attributes=call_site)
+    _http_calls_histogram.record(amount=len(stats.http_calls), attributes=call_site)
+
+
+def track_call_site(handler: Callable) -> Callable:
+    call_site = f"routes.{handler.__name__}"
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        stats = _CallSiteStats(call_site=call_site)
+        token = _call_site_stats.set(stats)
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            _call_site_stats.reset(token)
+            _finish_call_site(stats=stats)
+
+    return wrapper
+
+
+def _record(kind: str, histogram: Any, attributes: dict[str, Any], start: float) -> None:
+    duration = (time.perf_counter() - start) * 1000
+
+    stats = _call_site_stats.get()
+    if stats is None:
+        histogram.record(amount=duration, attributes={**attributes, "call_site": "background"})
+        return
+
+    getattr(stats, kind).append((attributes, duration))
+
+
+def http_request(method: str, url: str, **kwargs) -> requests.Response:
+    attributes = {"target": urlparse(url).hostname or "unknown", "method": method}
+
+    start = time.perf_counter()
+    try:
+        response = requests.request(method, url, **kwargs)
+        attributes["status_code"] = response.status_code
+        return response
+    except Exception:
+        attributes["status_code"] = "error"
+        raise
+    finally:
+        _record(
+            kind="http_calls",
+            histogram=_http_duration_histogram,
+            attributes=attributes,
+            start=start,
+        )
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    return http_request("GET", url, **kwargs)
+
+
+class InstrumentedRedis(StrictRedis):
+    def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            _record(
+                kind="redis_round_trips",
+                histogram=_redis_duration_histogram,
+                attributes={"operation": str(args[0]).lower()},
+                start=start,
+            )
+
+
+class InstrumentedRedisCluster(RedisCluster):
+    def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            _record(
+                kind="redis_round_trips",
+                histogram=_redis_duration_histogram,
+                attributes={"operation": str(args[0]).lower()},
+                start=start,
+            )
@@ -0,0 +1,26 @@
+import os
+
+# generated question content is written by the portal and purged by the scoreboard, keep the
+# layout in line with theirs
+
+# each arcade event (workshop) gets its own slice of the keyspace, see the scoreboard's keys.py
+EVENT_ID = os.getenv("EVENT_ID", "")
+# talk to a redis cluster rather than a single redis, REDIS_HOST/REDIS_PORT are then just where we
+# first learn the cluster layout from
+REDIS_CLUSTER_MODE = os.getenv("REDIS_CLUSTER_MODE", "false").lower() == "true"
+
+
+def namespaced(key: str) -> str:
+    return f"event:{EVENT_ID}:{key}" if EVENT_ID else key
+
+
+# in cluster mode the player name is the redis cluster hash tag of every key that belongs to a
+# player, see the scoreboard's keys.py
+def get_player_hash_tag(player_name: str) -> str:
+    return f"{{{player_name}}}" if REDIS_CLUSTER_MODE else player_name
+
+
+def get_generated_question_key(title: str, player_name: str, question_id: str) -> str:
+    return namespaced(
+        f"content:quiz:{title}:{get_player_hash_tag(player_name=player_name)}:{question_id}"
+    )
@@ -2,10 +2,14 @@ import json
 import os
 from random import choice, randint, random
 
-from redis import StrictRedis
+from src.instrumentation import InstrumentedRedis, InstrumentedRedisCluster
+from src.keys import REDIS_CLUSTER_MODE, get_generated_question_key
 
 SPLUNK_OBSERVABILITY_REALM = os.getenv("SPLUNK_OBSERVABILITY_REALM", "us1")
 
+REDIS_HOST = os.getenv("REDIS_HOST", "cache")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+
 # for now, 30% of the time we'll try to use a ai gen question
 OPENAI_QUESTION_CHANCE_THRESHOLD = 0.3
 MAX_QUESTION_SELECTION_ATTEMPTS = 15
@@ -47,11 +51,10 @@ class _Questions:
     def __init__(self):
         self.f = open("questions.json", mode="r")
         self.content = json.load(self.f)
-        self.redis = StrictRedis(
-            host=os.getenv("REDIS_HOST", "cache"),
-            port=6379,
-            db=0,
-            decode_responses=True,
+        self.redis = (
+            InstrumentedRedisCluster(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+            if REDIS_CLUSTER_MODE
+            else InstrumentedRedis(host=REDIS_HOST, port=REDIS_PORT, db=0, decode_responses=True)
         )
 
     def _get_random_generated_question_for_module(
@@ -59,9 +62,18 @@ class _Questions:
         module: str,
         player_name: str,
     ) -> dict | None:
-        key_namespace = f"content:quiz:{module}:{player_name}:*"
+        key_namespace = get_generated_question_key(
+            title=module, player_name=player_name, question_id="*"
+        )
 
-        found_keys = self.redis.keys(pattern=key_namespace)
+        if REDIS_CLUSTER_MODE:
+            # every key of the player's lives on the node that owns the player's hash tag, so
+            # that is the only node worth asking (keys otherwise only asks a default node)
+            found_keys = self.redis.keys(
+                pattern=key_namespace, target_nodes=self.redis.get_node_from_key(key_namespace)
+            )
+        else:
+            found_keys = self.redis.keys(pattern=key_namespace)
         if not found_keys:
             return None
 
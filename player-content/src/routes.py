@@ -1,10 +1,10 @@
 import os
 from typing import Annotated
 
-import requests
 from fastapi import APIRouter, Header, HTTPException
 from fastapi.responses import JSONResponse
 
+from src.instrumentation import http_get, track_call_site
 from src.questions import _Questions
 from src.walkthroughs import _Walkthroughs
 
@@ -19,10 +19,11 @@ def alive():
 
 
 @router.get("/quiz/question/{module}")
+@track_call_site
 async def get_question(
     module: str, player_name: Annotated[str | None, Header()] = None
 ) -> JSONResponse:
-    seen_questions_resp = requests.get(
+    seen_questions_resp = http_get(
         f"http://{SCOREBOARD_HOST}/player_seen_questions/{module}",
         headers={"Player-Name": player_name},
     )
@@ -39,6 +40,7 @@ async def get_question(
 
 
 @router.get("/walkthrough/{module}/{stage}")
+@track_call_site
 async def get_walkthrough(module: str, stage: int) -> JSONResponse:
     w = _Walkthroughs()
 
@@ -3,8 +3,11 @@ import os
 from flask import Flask
 from flask_session import Session
 from redis import StrictRedis
+from redis.cluster import RedisCluster
 from sqlalchemy import text
 
+from src.archiver import start_archiver
+from src.cache import REDIS_CLUSTER_MODE, REDIS_HOST, REDIS_PORT
 from src.db import db, migrate
 from src.login import login
 from src.routes import routes
@@ -20,10 +23,10 @@ class Config:
     SESSION_PERMANENT = False
     SESSION_USE_SIGNER = True
     SESSION_SERIALIZATION_FORMAT = "json"
-    SESSION_REDIS = StrictRedis(
-        host=os.getenv("REDIS_HOST", "cache"),
-        port=6379,
-        db=0,
+    SESSION_REDIS = (
+        RedisCluster(host=REDIS_HOST, port=REDIS_PORT)
+        if REDIS_CLUSTER_MODE
+        else StrictRedis(host=REDIS_HOST, port=REDIS_PORT, db=0)
     )
 
 
@@ -50,4 +53,6 @@ def create_app():
             print(f"db not ready... exception: {exc}")
             os._exit(1)
 
+    start_archiver(app)
+
     return app
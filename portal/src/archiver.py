@@ -0,0 +1,230 @@
+import os
+import socket
+import threading
+import time
+from typing import Any
+
+from redis import StrictRedis
+from redis.exceptions import ResponseError
+from sqlalchemy.dialects.postgresql import insert
+
+from src.cache import new_redis_conn
+from src.db import db
+from src.keys import (
+    AGGREGATE_SHARDS,
+    EVENT_ID,
+    get_event_stream_key,
+    get_game_score_key,
+    get_question_hash,
+    get_quiz_key,
+)
+from src.models import GameSessionArchive, QuizAnswerArchive
+
+# finished game sessions (the scoreboard compacts a session to its summary once the game is over)
+# and answered quiz records are copied into postgres, marked as archived, and then only kept in
+# redis for ARCHIVE_HOT_RETENTION_SECONDS -- long enough for whatever still reads them from redis,
+# after which history comes from the (indexed) tables instead of scans.
+#
+# rather than scanning every record for the ones that changed, the archiver follows the
+# scoreboard's event stream (see the scoreboard's event_log.py), whose events carry the record
+# fields, through a consumer group of its own shared by every portal replica. an event is only
+# acked once its rows are in postgres and its record is marked, so a replica dying mid batch
+# leaves its events pending for another replica to claim. the stream only goes back
+# EVENT_STREAM_RETENTION_SECONDS, an archiver that is down for longer than that misses whatever
+# was trimmed in the meantime (those records simply expire out of redis unarchived).
+ARCHIVER_ENABLED = os.getenv("ARCHIVER_ENABLED", "true").lower() == "true"
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "60"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_HOT_RETENTION_SECONDS = int(os.getenv("ARCHIVE_HOT_RETENTION_SECONDS", "86400"))
+# how long an event can sit delivered but unacked before another replica takes it over
+ARCHIVE_CLAIM_IDLE_MS = int(ARCHIVE_INTERVAL_SECONDS * 5 * 1000)
+
+ARCHIVER_GROUP = "archiver"
+GAME_SCORE_EVENT = "game_score"
+QUIZ_SCORE_EVENT = "quiz_score"
+
+ARCHIVED_FIELD = "archived"
+
+# KEYS: archived record
+# ARGV: archived field, hot retention seconds
+# a record can be reset/purged/expire between being read and archived, marking it blindly would
+# bring it back as a stub with nothing but the archived field. lt keeps a shorter ttl the key may
+# already have
+MARK_ARCHIVED_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HSET', KEYS[1], ARGV[1], 1)
+    redis.call('EXPIRE', KEYS[1], ARGV[2], 'LT')
+end
+return 1
+"""
+
+
+def _ensure_consumer_group(redis: StrictRedis, stream_key: str) -> None:
+    # a new group starts from the oldest event the stream still holds. checked every pass since a
+    # purge of everything drops the stream and its groups with it
+    try:
+        redis.xgroup_create(stream_key, ARCHIVER_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def _read_events(redis: StrictRedis, stream_key: str, consumer: str) -> list[tuple[str, Any]]:
+    # events a replica was handed but never acked (it died, or postgres was down) come first, then
+    # new events
+    _, entries, *_ = redis.xautoclaim(
+        stream_key,
+        ARCHIVER_GROUP,
+        consumer,
+        min_idle_time=ARCHIVE_CLAIM_IDLE_MS,
+        start_id="0-0",
+        count=ARCHIVE_BATCH_SIZE,
+    )
+    if entries:
+        return entries
+
+    response = redis.xreadgroup(
+        ARCHIVER_GROUP, consumer, {stream_key: ">"}, count=ARCHIVE_BATCH_SIZE
+    )
+    return response[0][1] if response else []
+
+
+def _to_game_session_row(event: dict[str, str]) -> dict[str, Any] | None:
+    if event.get("active") != "0":
+        # still being played
+        return None
+
+    return {
+        "event_id": EVENT_ID,
+        "game_session_id": event["game_session_id"],
+        "title": event["title"],
+        "version": event.get("version"),
+        "player_name": event["player_name"],
+        "player_id": event.get("player_id"),
+        "current_score": int(float(event.get("current_score", 0))),
+    }
+
+
+def _to_quiz_answer_row(event: dict[str, str]) -> dict[str, Any]:
+    return {
+        "event_id": EVENT_ID,
+        "game_session_id": event["game_session_id"],
+        "question_hash": get_question_hash(question=event["question"]),
+        "question": event["question"],
+        "title": event["title"],
+        "player_name": event["player_name"],
+        "source": event.get("source"),
+        "attempts": int(event.get("attempts", 0)),
+        "time_taken": float(event.get("time_taken", 0)),
+    }
+
+
+def _collect_rows(
+    entries: list[tuple[str, Any]],
+) -> tuple[dict[str, dict[str, Any]], dict[str, dict[str, Any]]]:
+    # rows by the key of the record they came from, a later event for the same record replaces
+    # the row of an earlier one in the batch
+    game_rows, quiz_rows = {}, {}
+
+    for entry_id, event in entries:
+        # pending entries that were deleted (purged) since they were delivered have no fields
+        if not event:
+            continue
+
+        try:
+            if event.get("type") == GAME_SCORE_EVENT:
+                row = _to_game_session_row(event=event)
+                if row is not None:
+                    key = get_game_score_key(
+                        player_name=row["player_name"],
+                        title=row["title"],
+                        game_session_id=row["game_session_id"],
+                    )
+                    game_rows[key] = row
+            elif event.get("type") == QUIZ_SCORE_EVENT:
+                row = _to_quiz_answer_row(event=event)
+                key = get_quiz_key(
+                    player_name=row["player_name"],
+                    title=row["title"],
+                    game_session_id=row["game_session_id"],
+                    question=row["question"],
+                )
+                quiz_rows[key] = row
+        except (KeyError, ValueError) as e:
+            print(f"ignoring unarchivable event {entry_id}, exception: {e}")
+
+    return game_rows, quiz_rows
+
+
+def _insert_rows(model: Any, conflict_columns: list[str], rows: dict[str, dict[str, Any]]) -> None:
+    if not rows:
+        return
+
+    # a quiz record is written again on every attempt (and a session could in theory be finalized
+    # twice), so the latest event wins over whatever an earlier one archived
+    statement = insert(model).values(list(rows.values()))
+    columns = [column for column in next(iter(rows.values())) if column not in conflict_columns]
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=conflict_columns,
+            set_={column: statement.excluded[column] for column in columns},
+        )
+    )
+
+
+def archive_events(redis: StrictRedis, shard: int, consumer: str) -> int:
+    stream_key = get_event_stream_key(shard=shard)
+    _ensure_consumer_group(redis=redis, stream_key=stream_key)
+
+    archived = 0
+
+    while True:
+        entries = _read_events(redis=redis, stream_key=stream_key, consumer=consumer)
+        if not entries:
+            return archived
+
+        game_rows, quiz_rows = _collect_rows(entries=entries)
+
+        _insert_rows(model=GameSessionArchive, conflict_columns=["game_session_id"], rows=game_rows)
+        _insert_rows(
+            model=QuizAnswerArchive,
+            conflict_columns=["game_session_id", "question_hash"],
+            rows=quiz_rows,
+        )
+        db.session.commit()
+
+        # only once the rows are safely in postgres do the redis copies start counting down, and
+        # the events get acked
+        pipeline = redis.pipeline(transaction=False)
+        for key in [*game_rows, *quiz_rows]:
+            pipeline.eval(MARK_ARCHIVED_LUA, 1, key, ARCHIVED_FIELD, ARCHIVE_HOT_RETENTION_SECONDS)
+        pipeline.xack(stream_key, ARCHIVER_GROUP, *[entry_id for entry_id, _ in entries])
+        pipeline.execute()
+
+        archived += len(game_rows) + len(quiz_rows)
+
+        if len(entries) < ARCHIVE_BATCH_SIZE:
+            return archived
+
+
+def _run(app) -> None:
+    redis = new_redis_conn()
+    consumer = socket.gethostname()
+
+    while True:
+        time.sleep(ARCHIVE_INTERVAL_SECONDS)
+
+        with app.app_context():
+            try:
+                for shard in range(AGGREGATE_SHARDS):
+                    archive_events(redis=redis, shard=shard, consumer=consumer)
+            except Exception as e:
+                db.session.rollback()
+                print(f"ignoring archiver exception: {e}")
+
+
+def start_archiver(app) -> None:
+    if not ARCHIVER_ENABLED:
+        return
+
+    threading.Thread(target=_run, args=(app,), name="archiver", daemon=True).start()
@@ -1,16 +1,127 @@
 import os
+import threading
+import time
 
 from flask import g
+from opentelemetry import metrics
 from redis import StrictRedis
+from redis.backoff import ExponentialBackoff
+from redis.cluster import RedisCluster
+from redis.connection import BlockingConnectionPool
+from redis.retry import Retry
+
+REDIS_HOST = os.getenv("REDIS_HOST", "cache")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+# talk to a redis cluster rather than a single redis, REDIS_HOST/REDIS_PORT are then just where we
+# first learn the cluster layout from
+REDIS_CLUSTER_MODE = os.getenv("REDIS_CLUSTER_MODE", "false").lower() == "true"
+
+# size this (times replicas) against redis maxclients -- waitress serves the portal with 32
+# threads, plus the webhook handler threads
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "48"))
+# how long a request will wait on a free connection before giving up
+REDIS_POOL_TIMEOUT_SECONDS = float(os.getenv("REDIS_POOL_TIMEOUT_SECONDS", "5"))
+REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS", "2"))
+REDIS_SOCKET_TIMEOUT_SECONDS = float(os.getenv("REDIS_SOCKET_TIMEOUT_SECONDS", "5"))
+REDIS_HEALTH_CHECK_INTERVAL_SECONDS = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL_SECONDS", "30"))
+REDIS_RETRIES = 3
+
+
+class _InstrumentedConnectionPool(BlockingConnectionPool):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+
+        meter = metrics.get_meter("redis.pool")
+
+        self._wait_time_histogram = meter.create_histogram(
+            name="arcade.redis.pool.wait_time",
+            unit="ms",
+            description="time spent waiting to check a connection out of the redis pool",
+        )
+        self._in_use_counter = meter.create_up_down_counter(
+            name="arcade.redis.pool.connections_in_use",
+            description="redis pool connections currently checked out",
+        )
+
+    def get_connection(self, command_name=None, *keys, **options):
+        start = time.perf_counter()
+
+        connection = super().get_connection(command_name, *keys, **options)
+
+        self._wait_time_histogram.record(
+            amount=(time.perf_counter() - start) * 1000,
+            attributes={"max_connections": self.max_connections},
+        )
+        self._in_use_counter.add(amount=1, attributes={"max_connections": self.max_connections})
+
+        return connection
+
+    def release(self, connection) -> None:
+        super().release(connection)
+
+        self._in_use_counter.add(amount=-1, attributes={"max_connections": self.max_connections})
+
+
+_pool: BlockingConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_redis_pool() -> BlockingConnectionPool:
+    # one pool for the whole process; every request (and webhook handler thread) checks
+    # connections out of this rather than opening their own
+    global _pool  # noqa: PLW0603
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = _InstrumentedConnectionPool(
+                host=REDIS_HOST,
+                port=REDIS_PORT,
+                db=0,
+                decode_responses=True,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                timeout=REDIS_POOL_TIMEOUT_SECONDS,
+                socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+                socket_timeout=REDIS_SOCKET_TIMEOUT_SECONDS,
+                health_check_interval=REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+                retry_on_timeout=True,
+                retry=Retry(backoff=ExponentialBackoff(), retries=REDIS_RETRIES),
+            )
+
+        return _pool
+
+
+_cluster: RedisCluster | None = None
+
+
+def get_redis_cluster() -> RedisCluster:
+    # the cluster client keeps a (non blocking) pool per node itself, one of these per process
+    global _cluster  # noqa: PLW0603
+
+    with _pool_lock:
+        if _cluster is None:
+            _cluster = RedisCluster(
+                host=REDIS_HOST,
+                port=REDIS_PORT,
+                decode_responses=True,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+                socket_timeout=REDIS_SOCKET_TIMEOUT_SECONDS,
+                retry_on_timeout=True,
+                retry=Retry(backoff=ExponentialBackoff(), retries=REDIS_RETRIES),
+            )
+
+        return _cluster
+
+
+def new_redis_conn() -> StrictRedis | RedisCluster:
+    if REDIS_CLUSTER_MODE:
+        return get_redis_cluster()
+
+    return StrictRedis(connection_pool=get_redis_pool())
 
 
 def get_redis_conn():
     if "redis" not in g:
-        g.redis = StrictRedis(
-            host=os.getenv("REDIS_HOST", "cache"),
-            port=6379,
-            db=0,
-            decode_responses=True,
-        )
+        g.redis = new_redis_conn()
 
     return g.redis
@@ -3,6 +3,8 @@ import time
 
 from kubernetes import client, config
 
+from src.cache import REDIS_CLUSTER_MODE, REDIS_HOST, REDIS_PORT
+
 APP_NAME = "splunk-arcade"
 NAMESPACE = os.getenv("NAMESPACE") or "splunk-arcade"
 IMAGE_PLAYER_CABINET = os.getenv("PLAYER_CABINET_IMAGE") or "splunk-arcade/cabinet:latest"
@@ -234,9 +236,19 @@ def player_deployment_create(player_id: str, observability_realm: str) -> None:
                                     name="DATABASE_URL",
                                     value=POSTGRES_URL,
                                 ),
+                                # the cabinet keeps its sessions on whichever redis (or redis
+                                # cluster) the portal itself was pointed at
                                 client.V1EnvVar(
                                     name="REDIS_HOST",
-                                    value=f"{APP_NAME}-redis-master",
+                                    value=REDIS_HOST,
+                                ),
+                                client.V1EnvVar(
+                                    name="REDIS_PORT",
+                                    value=str(REDIS_PORT),
+                                ),
+                                client.V1EnvVar(
+                                    name="REDIS_CLUSTER_MODE",
+                                    value=str(REDIS_CLUSTER_MODE).lower(),
                                 ),
                                 client.V1EnvVar(
                                     name="SCOREBOARD_HOST", value=f"{APP_NAME}-scoreboard"
@@ -0,0 +1,58 @@
+import hashlib
+import os
+
+from src.cache import REDIS_CLUSTER_MODE
+
+# generated question content is shared with player-content (which serves it) and the scoreboard
+# (which purges it), keep the layout in line with theirs
+
+# each arcade event (workshop) gets its own slice of the keyspace, see the scoreboard's keys.py
+EVENT_ID = os.getenv("EVENT_ID", "")
+
+
+def namespaced(key: str) -> str:
+    return f"event:{EVENT_ID}:{key}" if EVENT_ID else key
+
+
+# in cluster mode the player name is the redis cluster hash tag of every key that belongs to a
+# player, see the scoreboard's keys.py
+def get_player_hash_tag(player_name: str) -> str:
+    return f"{{{player_name}}}" if REDIS_CLUSTER_MODE else player_name
+
+
+def get_generated_question_key(title: str, player_name: str, question_id: str) -> str:
+    return namespaced(
+        f"content:quiz:{title}:{get_player_hash_tag(player_name=player_name)}:{question_id}"
+    )
+
+
+def get_persisted_generated_question_key(title: str, player_name: str, question_id: str) -> str:
+    return namespaced(
+        f"persist:content:quiz:{title}:{get_player_hash_tag(player_name=player_name)}:{question_id}"
+    )
+
+
+# the score/quiz records, their aggregates shards and the event stream are owned by the scoreboard,
+# the archiver follows the event stream and marks the records it archived
+AGGREGATE_SHARDS = int(os.getenv("AGGREGATE_SHARDS", "16")) if REDIS_CLUSTER_MODE else 1
+
+
+def get_event_stream_key(shard: int) -> str:
+    return namespaced(f"events:{{aggregates:{shard}}}" if REDIS_CLUSTER_MODE else "events")
+
+
+def get_question_hash(question: str) -> str:
+    return hashlib.sha256(question.encode("utf-8")).hexdigest()
+
+
+def get_game_score_key(player_name: str, title: str, game_session_id: str) -> str:
+    return namespaced(
+        f"scores:{get_player_hash_tag(player_name=player_name)}:{title}:{game_session_id}"
+    )
+
+
+def get_quiz_key(player_name: str, title: str, game_session_id: str, question: str) -> str:
+    return namespaced(
+        f"quiz:{get_player_hash_tag(player_name=player_name)}:{title}:{game_session_id}:"
+        f"{get_question_hash(question=question)}"
+    )
@@ -68,3 +68,71 @@ class Workshop(db.Model):
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     title: so.Mapped[str] = so.mapped_column(sa.String(140))
     description: so.Mapped[str] = so.mapped_column(sa.String(140))
+
+
+class GameSessionArchive(db.Model):
+    # finished game sessions moved out of redis by the archiver, see archiver.py
+    __table_args__ = (
+        # history pages are filtered by one of these and walked newest (highest id) first
+        sa.Index("ix_game_session_archive_player_name_id", "player_name", "id"),
+        sa.Index("ix_game_session_archive_title_id", "title", "id"),
+        sa.Index("ix_game_session_archive_event_id_id", "event_id", "id"),
+        sa.Index("ix_game_session_archive_title_score", "title", "current_score"),
+    )
+
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    event_id: so.Mapped[str] = so.mapped_column(sa.String(64))
+    game_session_id: so.Mapped[str] = so.mapped_column(sa.String(64), unique=True)
+    title: so.Mapped[str] = so.mapped_column(sa.String(64))
+    version: so.Mapped[str | None] = so.mapped_column(sa.String(32))
+    player_name: so.Mapped[str] = so.mapped_column(sa.String(64))
+    player_id: so.Mapped[str | None] = so.mapped_column(sa.String(256))
+    current_score: so.Mapped[int] = so.mapped_column(sa.BigInteger)
+    archived_at: so.Mapped[datetime] = so.mapped_column(default=lambda: datetime.now(UTC))
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "event_id": self.event_id,
+            "game_session_id": self.game_session_id,
+            "title": self.title,
+            "version": self.version,
+            "player_name": self.player_name,
+            "current_score": self.current_score,
+            "archived_at": self.archived_at.isoformat(),
+        }
+
+
+class QuizAnswerArchive(db.Model):
+    __table_args__ = (
+        sa.UniqueConstraint("game_session_id", "question_hash"),
+        sa.Index("ix_quiz_answer_archive_player_name_id", "player_name", "id"),
+        sa.Index("ix_quiz_answer_archive_title_id", "title", "id"),
+        sa.Index("ix_quiz_answer_archive_event_id_id", "event_id", "id"),
+    )
+
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    event_id: so.Mapped[str] = so.mapped_column(sa.String(64))
+    game_session_id: so.Mapped[str] = so.mapped_column(sa.String(64))
+    question_hash: so.Mapped[str] = so.mapped_column(sa.String(64))
+    question: so.Mapped[str] = so.mapped_column(sa.Text)
+    title: so.Mapped[str] = so.mapped_column(sa.String(64))
+    player_name: so.Mapped[str] = so.mapped_column(sa.String(64))
+    source: so.Mapped[str | None] = so.mapped_column(sa.String(32))
+    attempts: so.Mapped[int] = so.mapped_column()
+    time_taken: so.Mapped[float] = so.mapped_column()
+    archived_at: so.Mapped[datetime] = so.mapped_column(default=lambda: datetime.now(UTC))
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "event_id": self.event_id,
+            "game_session_id": self.game_session_id,
+            "question": self.question,
+            "title": self.title,
+            "player_name": self.player_name,
+            "source": self.source,
+            "attempts": self.attempts,
+            "time_taken": self.time_taken,
+            "archived_at": self.archived_at.isoformat(),
+        }
@@ -8,6 +8,7 @@ import openai
 import yaml
 
 from src.cache import get_redis_conn
+from src.keys import get_generated_question_key, get_persisted_generated_question_key
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 SPLUNK_OBSERVABILITY_API_TOKEN = os.getenv("SPLUNK_OBSERVABILITY_API_TOKEN")
@@ -102,7 +103,9 @@ def _handle_splunk_webhook_content(app, payload: dict[str, Any]) -> None:
     with app.app_context():
         redis = get_redis_conn()
 
-        key = f"content:quiz:{game_title}:{player_name}:{question_title}"
+        key = get_generated_question_key(
+            title=game_title, player_name=player_name, question_id=question_title
+        )
         redis.hmset(key, question)
         redis.expire(key, 360)
 
@@ -196,11 +199,15 @@ def _handle_splunk_webhook_content_openai(app, payload: dict[str, Any]) -> None:
     with app.app_context():
         redis = get_redis_conn()
 
-        key = f"content:quiz:{game_title}:{player_name}:{question_hash.hexdigest()}"
+        key = get_generated_question_key(
+            title=game_title, player_name=player_name, question_id=question_hash.hexdigest()
+        )
         redis.hmset(key, question)
         redis.expire(key, 360)
 
         # duplicating in a "persist" hash so that we dont have too many questions for each player
         # to loop over and stuff
-        key = f"persist:content:quiz:{game_title}:{player_name}:{question_hash.hexdigest()}"
+        key = get_persisted_generated_question_key(
+            title=game_title, player_name=player_name, question_id=question_hash.hexdigest()
+        )
         redis.hmset(key, question)
@@ -37,7 +37,7 @@ from src.forms import (
     LoginForm,
     RegistrationForm,
 )
-from src.models import User
+from src.models import GameSessionArchive, QuizAnswerArchive, User
 from src.questions import _handle_splunk_webhook_content, _handle_splunk_webhook_content_openai
 
 routes = Blueprint("routes", __name__)
@@ -47,6 +47,9 @@ SPLUNK_OBSERVABILITY_REALM = os.getenv("SPLUNK_OBSERVABILITY_REALM", "")
 SPLUNK_OBSERVABILITY_API_ACCESS_TOKEN = os.getenv("SPLUNK_OBSERVABILITY_API_ACCESS_TOKEN", "")
 
 
+DEFAULT_HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 500
+
 WAIT_ARCADE_CHOICES = [
     "Initializing Terraform to provision your custom dashboards...",
     "Deploying your player's environment in the Kubernetes cluster...",
@@ -234,137 +237,24 @@ def wait_arcade():
     )
 
 
-def calculate_quiz_answer_score(
-    attempts: int,
-    time_taken: float,
-) -> float:
-    attempt_score = {1: 1.0, 2: 0.75, 3: 0.5, 4: 0.25}.get(attempts, 0)
-
-    time_score = max(0, min(1, 1 - (time_taken / 3600)))
-
-    total_score = (attempt_score + time_score) / 2
-
-    return round(total_score * 100)
-
-
-def calculate_blended_score(
-    game_score: int,
-    quiz_score: int,
-    max_game_score: int,
-):
-    game_weight = 0.6
-    quiz_weight = 0.4
-
-    normalized_game_score = game_score / max_game_score if max_game_score > 0 else 0
-
-    overall_score = (normalized_game_score * game_weight) + (quiz_score * quiz_weight)
-
-    return round(overall_score)
-
-
 @routes.route("/scoreboard")
 @login_required
-def scoreboard():  # noqa C901
+def scoreboard():
     if not current_user.is_authenticated:
         return redirect(url_for("routes.login"))
 
-    game_scores = requests.get(f"http://{APP_NAME}-scoreboard/get_game_scores")
-
-    _high_scores_per_game_session = {}
-    for game_score in game_scores.json():
-        if game_score["game_session_id"] not in _high_scores_per_game_session:
-            _high_scores_per_game_session[game_score["game_session_id"]] = {
-                "title": game_score["title"],
-                "version": game_score["version"],
-                "player_name": game_score["player_name"],
-                "current_score": int(game_score["current_score"]),
-            }
-            continue
-
-        if (
-            game_score["current_score"]
-            > _high_scores_per_game_session[game_score["game_session_id"]]["current_score"]
-        ):
-            _high_scores_per_game_session[game_score["game_session_id"]]["current_score"] = int(
-                game_score["current_score"]
-            )
-
-    _high_scores_cumulative = {}
-    for game_score in game_scores.json():
-        if game_score["player_name"] not in _high_scores_cumulative:
-            _high_scores_cumulative[game_score["player_name"]] = {
-                "title": game_score["title"],
-                "player_name": game_score["player_name"],
-                "current_score": int(game_score["current_score"]),
-            }
-            continue
-
-        _high_scores_cumulative[game_score["player_name"]]["current_score"] += int(
-            game_score["current_score"]
-        )
-
-    quiz_scores = requests.get(f"http://{APP_NAME}-scoreboard/get_quiz_scores")
-
-    _high_scores_quiz = {}
-    for quiz_score in quiz_scores.json():
-        if quiz_score["player_name"] not in _high_scores_quiz:
-            _high_scores_quiz[quiz_score["player_name"]] = {
-                "player_name": quiz_score["player_name"],
-                "current_score": calculate_quiz_answer_score(
-                    attempts=int(quiz_score["attempts"]), time_taken=float(quiz_score["time_taken"])
-                ),
-            }
-            continue
-
-        _high_scores_quiz[quiz_score["player_name"]]["current_score"] += (
-            calculate_quiz_answer_score(
-                attempts=int(quiz_score["attempts"]), time_taken=float(quiz_score["time_taken"])
-            )
-        )
-
-    _high_scores = _high_scores_quiz.values()
-    max_game_score = 0
-
-    if _high_scores:
-        max_game_score = max(_high_scores_quiz.values(), key=lambda k: k["current_score"])[
-            "current_score"
-        ]
-
-    _high_scores_blended = {}
-    for player_name in _high_scores_cumulative.keys():
-        _high_scores_blended[player_name] = {
-            "player_name": player_name,
-            "current_score": calculate_blended_score(
-                game_score=_high_scores_cumulative[player_name]["current_score"],
-                quiz_score=_high_scores_quiz.get(player_name, {}).get("current_score", 0),
-                max_game_score=max_game_score,
-            ),
-        }
+    # the scoreboard service keeps these materialized for us, so this is one small read rather
+    # than pulling every score/quiz record and ranking them on every page view
+    leaderboards = requests.get(f"http://{APP_NAME}-scoreboard/leaderboards").json()
 
     return render_template(
         "scoreboard.html",
         title="Scoreboard",
         user=session,
-        high_scores_per_game_session=sorted(
-            [data for data in _high_scores_per_game_session.values()],
-            key=lambda x: x["current_score"],
-            reverse=True,
-        )[:10],
-        high_scores_cumulative=sorted(
-            [data for data in _high_scores_cumulative.values()],
-            key=lambda x: x["current_score"],
-            reverse=True,
-        )[:10],
-        high_scores_quiz=sorted(
-            [data for data in _high_scores_quiz.values()],
-            key=lambda x: x["current_score"],
-            reverse=True,
-        )[:10],
-        high_scores_blended=sorted(
-            [data for data in _high_scores_blended.values()],
-            key=lambda x: x["current_score"],
-            reverse=True,
-        )[:10],
+        high_scores_per_game_session=leaderboards["per_game_session"],
+        high_scores_cumulative=leaderboards["cumulative"],
+        high_scores_quiz=leaderboards["quiz"],
+        high_scores_blended=leaderboards["blended"],
     )
 
 
@@ -409,3 +299,53 @@ def splunk_webhook():
             print("non 200 response from clearing incident: ", ret.text)
 
     return jsonify(success=True)
+
+
+def _history_page(model):
+    # the logged in player's archived records, newest first, optionally filtered down to a
+    # title/event. pages are keyset paginated on id (pass the returned next_before to get the
+    # following page) so deep pages are as cheap as the first one
+    try:
+        limit = int(request.args.get("limit", DEFAULT_HISTORY_PAGE_SIZE))
+        before = request.args.get("before", type=int)
+    except ValueError:
+        return jsonify(error="limit must be an integer"), 400
+
+    if not 0 < limit <= MAX_HISTORY_PAGE_SIZE:
+        return jsonify(error=f"limit must be between 1 and {MAX_HISTORY_PAGE_SIZE}"), 400
+
+    # players only ever get to see their own history, usernames are what players are named by
+    # everywhere else (see cluster.py)
+    query = (
+        sa.select(model)
+        .where(model.player_name == current_user.username)
+        .order_by(model.id.desc())
+        .limit(limit)
+    )
+
+    for column in ("title", "event_id"):
+        value = request.args.get(column)
+        if value is not None:
+            query = query.where(getattr(model, column) == value)
+
+    if before is not None:
+        query = query.where(model.id < before)
+
+    records = db.session.scalars(query).all()
+
+    return jsonify(
+        records=[record.to_dict() for record in records],
+        next_before=records[-1].id if len(records) == limit else None,
+    )
+
+
+@routes.route("/history/games", methods=["GET"])
+@login_required
+def game_history():
+    return _history_page(model=GameSessionArchive)
+
+
+@routes.route("/history/quiz", methods=["GET"])
+@login_required
+def quiz_history():
+    return _history_page(model=QuizAnswerArchive)
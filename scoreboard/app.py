@@ -1,7 +1,9 @@
+import os
+
 from waitress import serve
 
 from src import create_app
 
 if __name__ == "__main__":
     app = create_app()
-    serve(app, port=5000)
+    serve(app, port=int(os.getenv("PORT", "5000")))
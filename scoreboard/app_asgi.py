@@ -0,0 +1,9 @@
+import os
+
+import uvicorn
+
+from src.asgi import create_asgi_app
+
+if __name__ == "__main__":
+    app = create_asgi_app()
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "5000")))
@@ -0,0 +1,96 @@
+# run from the scoreboard dir: REDIS_HOST=localhost python -m benchmarks.bulk_reads
+import os
+import time
+import uuid
+
+from redis import StrictRedis
+
+from src.cache import SCAN_BATCH_SIZE, scan_hashes
+
+KEY_PREFIX = "benchmark:scores"
+KEY_COUNTS = [10_000, 100_000]
+SEED_BATCH_SIZE = 1_000
+
+
+def seed(client: StrictRedis, count: int) -> None:
+    pipeline = client.pipeline(transaction=False)
+
+    for index in range(count):
+        player_name = f"player-{index % 500}"
+        game_session_id = str(uuid.uuid4())
+
+        pipeline.hset(
+            f"{KEY_PREFIX}:{player_name}:imvaders:{game_session_id}",
+            mapping={
+                "game_session_id": game_session_id,
+                "title": "imvaders",
+                "player_name": player_name,
+                "active": "False",
+                "level": 3,
+                "lives_remaining": 0,
+                "current_score": index,
+                "duration": 120,
+                "version": 1.75,
+            },
+        )
+
+        if index % SEED_BATCH_SIZE == 0:
+            pipeline.execute()
+
+    pipeline.execute()
+
+
+def cleanup(client: StrictRedis) -> None:
+    pipeline = client.pipeline(transaction=False)
+
+    for index, key in enumerate(client.scan_iter(match=f"{KEY_PREFIX}:*", count=SEED_BATCH_SIZE)):
+        pipeline.unlink(key)
+
+        if index % SEED_BATCH_SIZE == 0:
+            pipeline.execute()
+
+    pipeline.execute()
+
+
+def read_per_key(client: StrictRedis) -> int:
+    # what get_game_scores used to do: one hgetall round trip per scanned key
+    return sum(1 for key in client.scan_iter(match=f"{KEY_PREFIX}:*") if client.hgetall(key))
+
+
+def read_pipelined(client: StrictRedis) -> int:
+    return sum(1 for _ in scan_hashes(redis=client, match=f"{KEY_PREFIX}:*"))
+
+
+def main():
+    print(f"ensure REDIS_HOST points at a scratch redis, keys under {KEY_PREFIX}:* get clobbered")
+
+    client = StrictRedis(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", "6379")),
+        db=0,
+        decode_responses=True,
+    )
+
+    for count in KEY_COUNTS:
+        cleanup(client=client)
+        seed(client=client, count=count)
+
+        results = {}
+
+        for name, read in (("per key", read_per_key), ("pipelined", read_pipelined)):
+            start = time.perf_counter()
+            found = read(client=client)
+            results[name] = time.perf_counter() - start
+
+            print(f"{count:>7} keys | {name:<9} | {results[name]:8.3f}s | {found} hashes read")
+
+        print(
+            f"{count:>7} keys | speedup {results["per key"] / results["pipelined"]:.1f}x "
+            f"(batch size {SCAN_BATCH_SIZE})"
+        )
+
+    cleanup(client=client)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# run from the scoreboard dir: REDIS_HOST=localhost python -m benchmarks.score_encoding
+import os
+import random
+import re
+import uuid
+
+from redis import StrictRedis
+from redis.exceptions import ResponseError
+
+from src.routes import to_scoreboard_update
+from src.score_schema import encode_game_score
+
+KEY_PREFIX = "benchmark:encoding"
+SESSION_COUNT = 10_000
+SEED_BATCH_SIZE = 1_000
+
+
+def imvaders_tick(index: int) -> dict:
+    # what the imvaders cabinet posts every couple of seconds
+    return {
+        "game_session_id": str(uuid.uuid4()),
+        "title": "imvaders",
+        "player_name": f"player-{index % 500}",
+        "player_id": str(uuid.uuid4()),
+        "active": True,
+        "level": random.randint(1, 10),
+        "lives_remaining": random.randint(0, 3),
+        "current_score": random.randint(0, 50_000),
+        "position": [random.uniform(0, 800), random.uniform(0, 600)],
+        "projectiles": random.randint(0, 20),
+        "duration": random.randint(2, 600),
+        "version": 1.75,
+    }
+
+
+def seed(client: StrictRedis, prefix: str, encode) -> list[str]:
+    keys = []
+    pipeline = client.pipeline(transaction=False)
+
+    for index in range(SESSION_COUNT):
+        key = f"{prefix}:{index}"
+        keys.append(key)
+        pipeline.hset(key, mapping=encode(imvaders_tick(index=index)))
+
+        if index % SEED_BATCH_SIZE == 0:
+            pipeline.execute()
+
+    pipeline.execute()
+
+    return keys
+
+
+def cleanup(client: StrictRedis) -> None:
+    pipeline = client.pipeline(transaction=False)
+
+    for index, key in enumerate(client.scan_iter(match=f"{KEY_PREFIX}:*", count=SEED_BATCH_SIZE)):
+        pipeline.unlink(key)
+
+        if index % SEED_BATCH_SIZE == 0:
+            pipeline.execute()
+
+    pipeline.execute()
+
+
+def memory_usage(client: StrictRedis, keys: list[str]) -> int | None:
+    pipeline = client.pipeline(transaction=False)
+    for key in keys:
+        pipeline.memory_usage(key, samples=0)
+
+    try:
+        return sum(pipeline.execute())
+    except ResponseError:
+        # not every redis speaks MEMORY (fakeredis doesnt)
+        return None
+
+
+# a canonical int64 string (no sign but '-', no leading zeros) is stored as an integer in a listpack
+_LISTPACK_INT = re.compile(r"-?[1-9][0-9]{0,18}|0")
+# the encodings of redis' listpack.c: 0..127 fit the 1 byte 7 bit uint encoding, other integers
+# take the smallest signed width (bound, bytes) they fit, strings a 1/2/5 byte length (up to
+# bound) in front of their bytes. an entry is followed by its length, in 1 byte up to 127
+_LISTPACK_SMALL_UINT_MAX = 127
+_LISTPACK_INT_ENCODINGS = ((2**12, 2), (2**15, 3), (2**23, 4), (2**31, 5), (2**63, 9))
+_LISTPACK_STR_ENCODINGS = ((2**6, 1), (2**12, 2), (2**32, 5))
+_LISTPACK_SHORT_BACKLEN_MAX = 127
+
+
+def _listpack_entry_size(value: str) -> int:
+    if _LISTPACK_INT.fullmatch(value) and -(2**63) <= int(value) < 2**63:
+        number = int(value)
+        if 0 <= number <= _LISTPACK_SMALL_UINT_MAX:
+            size = 1
+        else:
+            size = next(size for bound, size in _LISTPACK_INT_ENCODINGS if -bound <= number < bound)
+    else:
+        length = len(value.encode("utf-8"))
+        size = length + next(size for bound, size in _LISTPACK_STR_ENCODINGS if length < bound)
+
+    return size + (1 if size <= _LISTPACK_SHORT_BACKLEN_MAX else 2)
+
+
+def listpack_size(client: StrictRedis, keys: list[str]) -> int:
+    # what the hashes as stored take up listpack encoded -- the payload part of MEMORY USAGE,
+    # leaving out the key itself (the same for both encodings) and allocator rounding. 6 header
+    # bytes, the field/value entries, 1 end byte
+    pipeline = client.pipeline(transaction=False)
+    for key in keys:
+        pipeline.hgetall(key)
+
+    return sum(
+        6 + sum(_listpack_entry_size(item) for pair in record.items() for item in pair) + 1
+        for record in pipeline.execute()
+    )
+
+
+def main():
+    print(f"ensure REDIS_HOST points at a scratch redis, keys under {KEY_PREFIX}:* get clobbered")
+
+    client = StrictRedis(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", "6379")),
+        db=0,
+        decode_responses=True,
+    )
+
+    cleanup(client=client)
+
+    # before: every client field stringified and stored as is
+    encodings = (
+        ("verbatim", to_scoreboard_update),
+        ("schema", lambda tick: encode_game_score(to_scoreboard_update(content=tick))),
+    )
+
+    results = {}
+
+    for name, encode in encodings:
+        random.seed(0)
+        keys = seed(client=client, prefix=f"{KEY_PREFIX}:{name}", encode=encode)
+
+        used = memory_usage(client=client, keys=keys)
+        results[name] = (listpack_size(client=client, keys=keys), used)
+        fields = client.hlen(keys[0])
+        object_encoding = client.object("encoding", keys[0])
+
+        print(
+            f"{SESSION_COUNT} sessions | {name:<8} | "
+            f"{results[name][0] / SESSION_COUNT:7.1f} listpack bytes/session | "
+            f"{'n/a' if used is None else f'{used / SESSION_COUNT:7.1f}'} memory usage "
+            f"bytes/session | {fields} fields | {object_encoding}"
+        )
+
+    print(f"schema encoding listpacks are {results["schema"][0] / results["verbatim"][0]:.0%}")
+    if results["schema"][1] is not None:
+        used = results["schema"][1] / results["verbatim"][1]
+        print(f"schema encoding uses {used:.0%} of the memory")
+
+    cleanup(client=client)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# run from the scoreboard dir: REDIS_HOST=localhost python -m benchmarks.serving_modes
+# starts the scoreboard under waitress (app.py) and then under uvicorn (app_asgi.py) and hammers
+# each with concurrent score posts, the way a room full of cabinets would
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+from redis import StrictRedis
+
+from src.keys import get_event_namespace
+from src.purge import unlink_matching
+
+# the servers record everything under an event namespace of their own (see keys.py), so the
+# benchmark scores never show up on the real leaderboards/totals/event stream, and cleaning up
+# is dropping the namespace
+EVENT_ID = f"benchmark-{uuid.uuid4()}"
+PLAYER_PREFIX = "benchmark-player"
+TITLE = "imvaders"
+PORT = 5099
+REQUESTS_PER_RUN = 5_000
+CONCURRENCY_LEVELS = [64, 512]
+PLAYERS = 200
+STARTUP_TIMEOUT_SECONDS = 30
+
+SERVING_MODES = {
+    "waitress": "app.py",
+    "asgi": "app_asgi.py",
+}
+
+
+def score_event(index: int, game_session_ids: list[str]) -> dict:
+    return {
+        "game_session_id": game_session_ids[index % PLAYERS],
+        "title": TITLE,
+        "player_name": f"{PLAYER_PREFIX}-{index % PLAYERS}",
+        "active": True,
+        "level": 1,
+        "lives_remaining": 3,
+        "current_score": index,
+        "duration": 60,
+        "version": 1.75,
+    }
+
+
+def cleanup(client: StrictRedis) -> None:
+    unlink_matching(redis=client, match=f"{get_event_namespace(event_id=EVENT_ID)}*")
+
+
+def start_server(script: str) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, script],
+        env={**os.environ, "PORT": str(PORT), "EVENT_ID": EVENT_ID},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://localhost:{PORT}/alive").raise_for_status()
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+
+    server.kill()
+    raise RuntimeError(f"{script} did not come up on port {PORT}")
+
+
+async def post_scores(concurrency: int, game_session_ids: list[str]) -> tuple[float, list, int]:
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=f"http://localhost:{PORT}",
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        timeout=60,
+    ) as client:
+
+        async def post(index: int) -> None:
+            nonlocal errors
+
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/record_game_score/", json=score_event(index, game_session_ids)
+                    )
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    return
+
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[post(index) for index in range(REQUESTS_PER_RUN)])
+
+        return time.perf_counter() - start, latencies, errors
+
+
+def main():
+    print(
+        f"ensure REDIS_HOST points at a scratch redis, scores get recorded under event {EVENT_ID}"
+    )
+
+    client = StrictRedis(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", "6379")),
+        db=0,
+        decode_responses=True,
+    )
+    game_session_ids = [str(uuid.uuid4()) for _ in range(PLAYERS)]
+
+    for mode, script in SERVING_MODES.items():
+        server = start_server(script=script)
+
+        try:
+            for concurrency in CONCURRENCY_LEVELS:
+                elapsed, latencies, errors = asyncio.run(
+                    post_scores(concurrency=concurrency, game_session_ids=game_session_ids)
+                )
+                latencies.sort()
+
+                if not latencies:
+                    print(f"{mode:<8} | {concurrency:>4} concurrent | every request failed")
+                    continue
+
+                print(
+                    f"{mode:<8} | {concurrency:>4} concurrent | "
+                    f"{len(latencies) / elapsed:8.0f} req/s | "
+                    f"p50 {statistics.median(latencies) * 1000:7.1f}ms | "
+                    f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:7.1f}ms | "
+                    f"{errors} errors"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+            cleanup(client=client)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,4 +2,10 @@
 
 set -euxo pipefail
 
-splunk-py-trace python app.py
\ No newline at end of file
+# SCOREBOARD_SERVER_MODE=asgi serves the hot routes from uvicorn on redis.asyncio instead of
+# waitress threads, see benchmarks/serving_modes.py
+if [ "${SCOREBOARD_SERVER_MODE:-wsgi}" = "asgi" ]; then
+    splunk-py-trace python app_asgi.py
+else
+    splunk-py-trace python app.py
+fi
@@ -0,0 +1,48 @@
+import argparse
+import socket
+import threading
+
+from src.cache import new_redis_conn
+from src.event_log import AGGREGATORS, consume_events
+from src.keys import AGGREGATE_SHARDS
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="apply the score/quiz event stream to a derived view via a consumer group"
+    )
+    parser.add_argument("aggregator", choices=sorted(AGGREGATORS))
+    parser.add_argument(
+        "--from-id",
+        help="replay the stream from this id ('0' for everything the stream still holds) rather "
+        "than carrying on from wherever the consumer group left off",
+    )
+    parser.add_argument(
+        "--exit-when-caught-up",
+        action="store_true",
+        help="exit once the stream is drained instead of waiting on new events",
+    )
+    args = parser.parse_args()
+
+    # each aggregates shard has a stream of its own (see keys.py), each drained by its own thread
+    processed = [0] * AGGREGATE_SHARDS
+
+    def consume_shard(shard: int) -> None:
+        processed[shard] = consume_events(
+            redis=new_redis_conn(),
+            group=args.aggregator,
+            consumer=socket.gethostname(),
+            shard=shard,
+            start_id=args.from_id,
+            stop_when_caught_up=args.exit_when_caught_up,
+        )
+
+    threads = [
+        threading.Thread(target=consume_shard, args=(shard,), daemon=True)
+        for shard in range(AGGREGATE_SHARDS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"{args.aggregator}: processed {sum(processed)} events")
@@ -0,0 +1,14 @@
+import argparse
+
+from src.cache import new_redis_conn
+from src.rebuild import rebuild_aggregates
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(
+        description="backfill the leaderboards, totals, progression counters and seen questions "
+        "from the recorded scores and quiz answers; safe to run more than once"
+    ).parse_args()
+
+    sessions, answers = rebuild_aggregates(redis=new_redis_conn())
+
+    print(f"rebuilt aggregates from {sessions} game sessions and {answers} quiz answers")
@@ -1,11 +1,14 @@
 from flask import Flask
 
+from src import instrumentation
 from src.routes import routes
 
 
 def create_app():
     app = Flask(__name__)
 
+    instrumentation.init_app(app)
+
     app.register_blueprint(routes)
 
     return app
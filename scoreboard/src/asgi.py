@@ -0,0 +1,144 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from a2wsgi import WSGIMiddleware
+from fastapi import FastAPI, Header, Request
+from opentelemetry import trace
+
+from src import create_app
+from src.cache import close_async_redis_pool, new_async_redis_conn, new_redis_conn
+from src.instrumentation import track_call_site
+from src.keys import get_player_progression_key, get_player_seen_questions_key
+from src.routes import (
+    PROGRESSION_CACHE,
+    SCORE_WRITE_BUFFER,
+    buffer_scoreboard_update,
+    build_player_progression,
+    invalidate_local_progression,
+    process_game_metrics,
+    queue_game_score_write,
+    queue_quiz_score_write,
+    to_quiz_answer_response,
+    to_quiz_update,
+    to_scoreboard_update,
+)
+from src.scripts import execute_pipeline_async
+
+
+async def record_game_score(request: Request) -> dict[str, Any]:
+    content = await request.json()
+
+    current_span = trace.get_current_span()
+    for k, v in content.items():
+        current_span.set_attribute(k, v)
+
+    scoreboard_update = to_scoreboard_update(content=content)
+
+    if SCORE_WRITE_BUFFER is None:
+        pipeline = new_async_redis_conn().pipeline(transaction=False)
+        queue_game_score_write(pipeline=pipeline, scoreboard_update=scoreboard_update)
+        await execute_pipeline_async(pipeline=pipeline)
+    else:
+        # the buffer is shared with the flask routes and finalizing writes through the sync pool,
+        # so keep it off the event loop
+        await asyncio.to_thread(
+            buffer_scoreboard_update,
+            redis=new_redis_conn(),
+            content=content,
+            scoreboard_update=scoreboard_update,
+        )
+
+    process_game_metrics(scoreboard_update=scoreboard_update)
+
+    return {}
+
+
+async def record_quiz_score(request: Request) -> dict[str, Any]:
+    redis = new_async_redis_conn()
+
+    quiz_update = to_quiz_update(content=await request.json())
+
+    pipeline = redis.pipeline(transaction=False)
+    queue_quiz_score_write(pipeline=pipeline, quiz_update=quiz_update)
+    is_new_record, question_counts, _ = (await execute_pipeline_async(pipeline=pipeline))[0]
+
+    if is_new_record:
+        invalidate_local_progression(player_name=quiz_update["player_name"])
+
+    return to_quiz_answer_response(
+        module=quiz_update["title"], is_new_record=is_new_record, question_counts=question_counts
+    )
+
+
+async def get_player_seen_questions(
+    module: str, player_name: str | None = Header(default=None)
+) -> list[str]:
+    if not player_name:
+        raise Exception("No Player Name provided")
+
+    seen_questions = await new_async_redis_conn().smembers(
+        get_player_seen_questions_key(player_name=player_name, module=module)
+    )
+
+    return list(seen_questions)
+
+
+async def compute_player_progression(player_name: str) -> dict[str, Any]:
+    return build_player_progression(
+        question_counts=await new_async_redis_conn().hgetall(
+            get_player_progression_key(player_name=player_name)
+        )
+    )
+
+
+async def get_player_progression(
+    player_name: str | None = Header(default=None),
+) -> dict[str, Any]:
+    if not player_name:
+        raise Exception("No Player Name provided")
+
+    if PROGRESSION_CACHE is None:
+        return await compute_player_progression(player_name=player_name)
+
+    progression = PROGRESSION_CACHE.get(player_name=player_name)
+    if progression is None:
+        generation = PROGRESSION_CACHE.generation()
+        progression = await compute_player_progression(player_name=player_name)
+        PROGRESSION_CACHE.put(
+            player_name=player_name, progression=progression, generation=generation
+        )
+
+    return progression
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+
+    # the async pool belongs to the loop the server ran on, so dont leave it around past it
+    await close_async_redis_pool()
+
+
+def create_asgi_app() -> FastAPI:
+    # the routes every cabinet hits on every game tick/answer get native async handlers so
+    # thousands of in flight requests can share one process waiting on redis rather than each
+    # holding a thread; everything else is served by the flask app as is
+    app = FastAPI(lifespan=lifespan, docs_url=None, redoc_url=None, openapi_url=None)
+
+    app.add_api_route("/record_game_score/", track_call_site(record_game_score), methods=["POST"])
+    app.add_api_route("/record_quiz_score/", track_call_site(record_quiz_score), methods=["POST"])
+    app.add_api_route(
+        "/player_seen_questions/{module}",
+        track_call_site(get_player_seen_questions),
+        methods=["GET"],
+    )
+    app.add_api_route(
+        "/player_progression", track_call_site(get_player_progression), methods=["GET"]
+    )
+
+    # routes are matched in order, so anything not handled above falls through to flask
+    app.mount("/", WSGIMiddleware(create_app()))
+
+    return app
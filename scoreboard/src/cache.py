@@ -1,16 +1,324 @@
 import os
+import threading
+import time
+from collections.abc import Iterator
+from typing import Any
 
 from flask import g
+from opentelemetry import metrics
 from redis import StrictRedis
+from redis.asyncio import BlockingConnectionPool as AsyncBlockingConnectionPool
+from redis.asyncio import StrictRedis as AsyncStrictRedis
+from redis.asyncio.cluster import RedisCluster as AsyncRedisCluster
+from redis.asyncio.retry import Retry as AsyncRetry
+from redis.backoff import ExponentialBackoff
+from redis.cluster import RedisCluster
+from redis.connection import BlockingConnectionPool
+from redis.retry import Retry
+
+from src.instrumentation import (
+    InstrumentedAsyncRedis,
+    InstrumentedAsyncRedisCluster,
+    InstrumentedRedis,
+    InstrumentedRedisCluster,
+)
+
+REDIS_HOST = os.getenv("REDIS_HOST", "cache")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+# talk to a redis cluster rather than a single redis. REDIS_HOST/REDIS_PORT are then just where
+# we first learn the cluster layout from. the key layout (see keys.py) keeps scripts and multi key
+# commands within a slot, and anything that walks the keyspace goes through scan_iter/scan_batches
+# which visit every primary in cluster mode
+REDIS_CLUSTER_MODE = os.getenv("REDIS_CLUSTER_MODE", "false").lower() == "true"
+SCAN_BATCH_SIZE = int(os.getenv("SCAN_BATCH_SIZE", "500"))
+
+# size this (times replicas) against redis maxclients -- waitress serves with 4 threads by default
+# plus the background workers (write behind flusher, progression subscriber, purges). in asgi mode
+# the async pool gets the same limit on top of the sync one the background workers still use
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "32"))
+# how long a request will wait on a free connection before giving up
+REDIS_POOL_TIMEOUT_SECONDS = float(os.getenv("REDIS_POOL_TIMEOUT_SECONDS", "5"))
+REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS", "2"))
+REDIS_SOCKET_TIMEOUT_SECONDS = float(os.getenv("REDIS_SOCKET_TIMEOUT_SECONDS", "5"))
+REDIS_HEALTH_CHECK_INTERVAL_SECONDS = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL_SECONDS", "30"))
+REDIS_RETRIES = 3
+
+
+class _PoolInstrumentation:
+    # shared by the sync and async pools so both report under the same instruments
+    def _init_instruments(self) -> None:
+        meter = metrics.get_meter("redis.pool")
+
+        self._wait_time_histogram = meter.create_histogram(
+            name="arcade.redis.pool.wait_time",
+            unit="ms",
+            description="time spent waiting to check a connection out of the redis pool",
+        )
+        self._in_use_counter = meter.create_up_down_counter(
+            name="arcade.redis.pool.connections_in_use",
+            description="redis pool connections currently checked out",
+        )
+
+    def _record_checkout(self, start: float) -> None:
+        self._wait_time_histogram.record(
+            amount=(time.perf_counter() - start) * 1000,
+            attributes={"max_connections": self.max_connections},
+        )
+        self._in_use_counter.add(amount=1, attributes={"max_connections": self.max_connections})
+
+    def _record_release(self) -> None:
+        self._in_use_counter.add(amount=-1, attributes={"max_connections": self.max_connections})
+
+
+class _InstrumentedConnectionPool(_PoolInstrumentation, BlockingConnectionPool):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+
+        self._init_instruments()
+
+    def get_connection(self, command_name=None, *keys, **options):
+        start = time.perf_counter()
+
+        connection = super().get_connection(command_name, *keys, **options)
+
+        self._record_checkout(start=start)
+
+        return connection
+
+    def release(self, connection) -> None:
+        super().release(connection)
+
+        self._record_release()
+
+
+class _InstrumentedAsyncConnectionPool(_PoolInstrumentation, AsyncBlockingConnectionPool):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+
+        self._init_instruments()
+
+    async def get_connection(self, command_name=None, *keys, **options):
+        start = time.perf_counter()
+
+        connection = await super().get_connection(command_name, *keys, **options)
+
+        self._record_checkout(start=start)
+
+        return connection
+
+    async def release(self, connection) -> None:
+        await super().release(connection)
+
+        self._record_release()
+
+
+def _pool_kwargs() -> dict[str, Any]:
+    return {
+        "host": REDIS_HOST,
+        "port": REDIS_PORT,
+        "db": 0,
+        "decode_responses": True,
+        "max_connections": REDIS_MAX_CONNECTIONS,
+        "timeout": REDIS_POOL_TIMEOUT_SECONDS,
+        "socket_connect_timeout": REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+        "socket_timeout": REDIS_SOCKET_TIMEOUT_SECONDS,
+        "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+        "retry_on_timeout": True,
+    }
+
+
+_pool: BlockingConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_redis_pool() -> BlockingConnectionPool:
+    # one pool for the whole process; every request (and background worker) checks connections
+    # out of this rather than opening their own
+    global _pool  # noqa: PLW0603
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = _InstrumentedConnectionPool(
+                **_pool_kwargs(),
+                retry=Retry(backoff=ExponentialBackoff(), retries=REDIS_RETRIES),
+            )
+
+        return _pool
+
+
+_cluster: RedisCluster | None = None
+
+
+def get_redis_cluster() -> RedisCluster:
+    # the cluster client keeps a (non blocking) pool per node itself, so like the pool above
+    # there is just one of these per process
+    global _cluster  # noqa: PLW0603
+
+    with _pool_lock:
+        if _cluster is None:
+            _cluster = InstrumentedRedisCluster(
+                host=REDIS_HOST,
+                port=REDIS_PORT,
+                decode_responses=True,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+                socket_timeout=REDIS_SOCKET_TIMEOUT_SECONDS,
+                retry_on_timeout=True,
+                retry=Retry(backoff=ExponentialBackoff(), retries=REDIS_RETRIES),
+            )
+
+        return _cluster
+
+
+def new_redis_conn() -> StrictRedis | RedisCluster:
+    if REDIS_CLUSTER_MODE:
+        return get_redis_cluster()
+
+    return InstrumentedRedis(connection_pool=get_redis_pool())
 
 
 def get_redis_conn():
     if "redis" not in g:
-        g.redis = StrictRedis(
-            host=os.getenv("REDIS_HOST", "cache"),
-            port=6379,
-            db=0,
+        g.redis = new_redis_conn()
+
+    return g.redis
+
+
+_async_pool: AsyncBlockingConnectionPool | None = None
+_async_cluster: AsyncRedisCluster | None = None
+
+
+def get_async_redis_pool() -> AsyncBlockingConnectionPool:
+    # the asgi app runs everything on a single event loop, and asyncio connections are tied to the
+    # loop they were opened on, so this is built lazily from inside that loop rather than at import
+    global _async_pool  # noqa: PLW0603
+
+    if _async_pool is None:
+        _async_pool = _InstrumentedAsyncConnectionPool(
+            **_pool_kwargs(),
+            retry=AsyncRetry(backoff=ExponentialBackoff(), retries=REDIS_RETRIES),
+        )
+
+    return _async_pool
+
+
+def get_async_redis_cluster() -> AsyncRedisCluster:
+    # same as get_async_redis_pool, built lazily from inside the event loop
+    global _async_cluster  # noqa: PLW0603
+
+    if _async_cluster is None:
+        _async_cluster = InstrumentedAsyncRedisCluster(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
             decode_responses=True,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+            socket_timeout=REDIS_SOCKET_TIMEOUT_SECONDS,
+            health_check_interval=REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+            retry=AsyncRetry(backoff=ExponentialBackoff(), retries=REDIS_RETRIES),
         )
 
-    return g.redis
+    return _async_cluster
+
+
+async def close_async_redis_pool() -> None:
+    global _async_pool, _async_cluster  # noqa: PLW0603
+
+    if _async_pool is not None:
+        await _async_pool.disconnect()
+        _async_pool = None
+
+    if _async_cluster is not None:
+        await _async_cluster.aclose()
+        _async_cluster = None
+
+
+def new_async_redis_conn() -> AsyncStrictRedis | AsyncRedisCluster:
+    if REDIS_CLUSTER_MODE:
+        return get_async_redis_cluster()
+
+    return InstrumentedAsyncRedis(connection_pool=get_async_redis_pool())
+
+
+def get_hashes(
+    redis: StrictRedis, keys: list[str], batch_size: int = SCAN_BATCH_SIZE
+) -> Iterator[dict[str, Any]]:
+    for offset in range(0, len(keys), batch_size):
+        pipeline = redis.pipeline(transaction=False)
+        for key in keys[offset : offset + batch_size]:
+            pipeline.hgetall(key)
+
+        for entry in pipeline.execute():
+            # a key can expire/be deleted between the scan and the hgetall
+            if entry:
+                yield entry
+
+
+def _scan_cluster_keys_page(
+    redis: RedisCluster, match: str, cursor: int, limit: int
+) -> tuple[int, list[str]]:
+    # every primary has a scan cursor of its own, so the cursor we hand out packs which primary
+    # (in a stable order) we are on along with that primary's cursor. it is still 0 at the start
+    # and once every primary has been walked, like a plain scan cursor
+    nodes = sorted(redis.get_primaries(), key=lambda node: node.name)
+    node_cursor, node_index = divmod(cursor, len(nodes))
+    keys = []
+
+    while node_index < len(nodes) and len(keys) < limit:
+        node = nodes[node_index]
+        cursors, page = redis.scan(cursor=node_cursor, match=match, count=limit, target_nodes=node)
+        keys.extend(page)
+
+        node_cursor = cursors[node.name]
+        if node_cursor == 0:
+            node_index += 1
+
+    if node_index == len(nodes):
+        return 0, keys
+
+    return node_cursor * len(nodes) + node_index, keys
+
+
+def scan_keys_page(
+    redis: StrictRedis | RedisCluster, match: str, cursor: int, limit: int
+) -> tuple[int, list[str]]:
+    if isinstance(redis, RedisCluster):
+        return _scan_cluster_keys_page(redis=redis, match=match, cursor=cursor, limit=limit)
+
+    # scan count is only a hint, so keep going until we have (at least) limit keys or the scan is
+    # done; a page can run a little over limit since we can only hand back whole scan pages
+    keys = []
+
+    while True:
+        cursor, page = redis.scan(cursor=cursor, match=match, count=limit)
+        keys.extend(page)
+
+        if cursor == 0 or len(keys) >= limit:
+            return cursor, keys
+
+
+def scan_batches(
+    redis: StrictRedis | RedisCluster, match: str, batch_size: int = SCAN_BATCH_SIZE
+) -> Iterator[list[str]]:
+    # scan_iter rather than our own cursor loop, since in cluster mode it walks every primary
+    batch = []
+
+    for key in redis.scan_iter(match=match, count=batch_size):
+        batch.append(key)
+
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def scan_hashes(
+    redis: StrictRedis | RedisCluster, match: str, batch_size: int = SCAN_BATCH_SIZE
+) -> Iterator[dict[str, Any]]:
+    # rather than one hgetall round trip per key, each batch of scan results is fetched in a
+    # single pipeline, so round trips scale with keys / batch_size instead of with the number of
+    # keys
+    for keys in scan_batches(redis=redis, match=match, batch_size=batch_size):
+        yield from get_hashes(redis=redis, keys=keys, batch_size=batch_size)
@@ -0,0 +1,166 @@
+import os
+import time
+from collections.abc import Callable
+
+from redis import StrictRedis
+from redis.client import Pipeline
+from redis.exceptions import ResponseError
+
+from src.keys import (
+    AGGREGATE_SHARDS,
+    get_aggregate_shard,
+    get_event_stream_key,
+    get_game_leaderboard_key,
+    get_game_leaderboard_member,
+    get_game_titles_key,
+    get_player_seen_questions_key,
+)
+
+# every game/quiz score write is also appended to a capped stream (by the same lua script that
+# does the write, see scripts.py) so derived views can be rebuilt from the event history and
+# expensive aggregation can run in consumers rather than in request handlers. the stream only
+# keeps the last EVENT_STREAM_RETENTION_SECONDS of events (MINID), which is how far back a replay
+# (event_worker.py --from-id 0) or a consumer that fell over (an event worker, the portal's
+# archiver) can catch up from -- a whole workshop day by default. the length cap is a backstop
+# against a burst on top of that, sized for EVENT_STREAM_WRITE_RATE events a second over the
+# retention window and split over the aggregates shards, each of which has a stream of its own.
+# both trims are approximate (~) so redis can drop whole stream nodes at a time.
+#
+# the write rate comes from the cabinets: imvaders posts its state every 2 seconds, logger on every
+# point scored, the quiz a handful of answers a game -- under an event a second per player, so a
+# busy event (~200 players) writes up to ~200 events a second. a stream node keeps the field names
+# once and an entry only its values and id, ~150 bytes for a game event (see
+# benchmarks/score_encoding.py for what a record weighs). the default 6 hours at that rate is
+# ~4.3M entries, ~650MB of redis at worst; a 60 player workshop at an event every 2 seconds a
+# player is ~650k entries, ~100MB. size redis maxmemory for it, or shorten the retention (not
+# below the longest a consumer may be down for) on a smaller redis.
+#
+# the stream only covers the views its consumers maintain (leaderboards, seen questions). totals
+# and progression counters are sums over everything a player ever did, which a capped stream cant
+# give back -- rebuild_aggregates.py recomputes those from the score/quiz records instead.
+EVENT_STREAM_RETENTION_SECONDS = int(os.getenv("EVENT_STREAM_RETENTION_SECONDS", "21600"))
+EVENT_STREAM_WRITE_RATE = int(os.getenv("EVENT_STREAM_WRITE_RATE", "200"))
+EVENT_STREAM_MAX_LENGTH = int(
+    os.getenv(
+        "EVENT_STREAM_MAX_LENGTH",
+        str(EVENT_STREAM_WRITE_RATE * EVENT_STREAM_RETENTION_SECONDS // AGGREGATE_SHARDS),
+    )
+)
+EVENT_CONSUMER_BATCH_SIZE = int(os.getenv("EVENT_CONSUMER_BATCH_SIZE", "500"))
+# block well under the pool's socket timeout so an idle stream never looks like a dead connection
+EVENT_CONSUMER_BLOCK_MS = 1000
+
+GAME_SCORE_EVENT = "game_score"
+QUIZ_SCORE_EVENT = "quiz_score"
+
+
+def get_event_stream_min_id() -> str:
+    # stream ids start with the millisecond they were added at
+    return str(int((time.time() - EVENT_STREAM_RETENTION_SECONDS) * 1000))
+
+
+def _aggregate_leaderboards(pipeline: Pipeline, event: dict[str, str]) -> None:
+    if event.get("type") != GAME_SCORE_EVENT:
+        return
+
+    try:
+        current_score = float(event["current_score"])
+    except (KeyError, ValueError):
+        return
+
+    # the event came off the stream of the player's aggregates shard, so the leaderboard shard is
+    # that same one
+    shard = get_aggregate_shard(player_name=event["player_name"])
+
+    pipeline.sadd(get_game_titles_key(shard=shard), event["title"])
+    pipeline.zadd(
+        get_game_leaderboard_key(title=event["title"], shard=shard),
+        {
+            get_game_leaderboard_member(
+                player_name=event["player_name"], game_session_id=event["game_session_id"]
+            ): current_score,
+        },
+        gt=True,
+    )
+
+
+def _aggregate_seen_questions(pipeline: Pipeline, event: dict[str, str]) -> None:
+    if event.get("type") != QUIZ_SCORE_EVENT:
+        return
+
+    pipeline.sadd(
+        get_player_seen_questions_key(player_name=event["player_name"], module=event["title"]),
+        event["question"],
+    )
+
+
+# consumer group name -> what it does with each event. aggregators must be idempotent, since a
+# replay (or a consumer dying before it acks) hands them events they have already seen.
+AGGREGATORS: dict[str, Callable[[Pipeline, dict[str, str]], None]] = {
+    "leaderboards": _aggregate_leaderboards,
+    "seen_questions": _aggregate_seen_questions,
+}
+
+
+def ensure_consumer_group(redis: StrictRedis, group: str, shard: int, start_id: str | None) -> None:
+    stream_key = get_event_stream_key(shard=shard)
+
+    # a new group starts from the oldest event the stream still holds; an existing group carries
+    # on from where it left off unless we were asked to replay from a specific id
+    try:
+        redis.xgroup_create(stream_key, group, id=start_id or "0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+        if start_id is not None:
+            redis.xgroup_setid(stream_key, group, id=start_id)
+
+
+def consume_events(  # noqa: PLR0913
+    redis: StrictRedis,
+    group: str,
+    consumer: str,
+    shard: int = 0,
+    start_id: str | None = None,
+    stop_when_caught_up: bool = False,
+) -> int:
+    aggregator = AGGREGATORS[group]
+    stream_key = get_event_stream_key(shard=shard)
+
+    ensure_consumer_group(redis=redis, group=group, shard=shard, start_id=start_id)
+
+    # anything delivered to this consumer that it never acked (it died mid batch) comes first,
+    # then new events
+    read_id = "0"
+    processed = 0
+
+    while True:
+        response = redis.xreadgroup(
+            group,
+            consumer,
+            {stream_key: read_id},
+            count=EVENT_CONSUMER_BATCH_SIZE,
+            block=None if read_id == "0" else EVENT_CONSUMER_BLOCK_MS,
+        )
+        entries = response[0][1] if response else []
+
+        if not entries:
+            if read_id == "0":
+                read_id = ">"
+                continue
+
+            if stop_when_caught_up:
+                return processed
+
+            continue
+
+        pipeline = redis.pipeline(transaction=False)
+        for _, event in entries:
+            # pending entries that were deleted (purged) since they were delivered have no fields
+            if event:
+                aggregator(pipeline, event)
+        pipeline.xack(stream_key, group, *[entry_id for entry_id, _ in entries])
+        pipeline.execute()
+
+        processed += len(entries)
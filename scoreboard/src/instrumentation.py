@@ -0,0 +1,235 @@
+import functools
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from typing import Any
+
+from flask import Flask, g, request
+from opentelemetry import metrics
+from redis import StrictRedis
+from redis.asyncio import StrictRedis as AsyncStrictRedis
+from redis.asyncio.client import Pipeline as AsyncPipeline
+from redis.asyncio.cluster import ClusterPipeline as AsyncClusterPipeline
+from redis.asyncio.cluster import RedisCluster as AsyncRedisCluster
+from redis.client import Pipeline
+from redis.cluster import ClusterPipeline, RedisCluster
+
+# per call site (the endpoint a request was routed to) redis round trips and their latency.
+# round trips made while handling a request are collected on the request and reported when it
+# finishes, labelled with its call site, alongside how many round trips/commands the request took
+# in total -- n+1 access patterns show up as call sites with a high round trip count. anything
+# outside of a request (background workers) is reported right away under "background".
+BACKGROUND_CALL_SITE = "background"
+
+_meter = metrics.get_meter("scoreboard.instrumentation")
+
+_redis_duration_histogram = _meter.create_histogram(
+    name="arcade.redis.client.duration",
+    unit="ms",
+    description="latency of a redis round trip (single command or pipeline) by call site",
+)
+_redis_round_trips_histogram = _meter.create_histogram(
+    name="arcade.redis.client.round_trips",
+    description="redis round trips made to handle a single request by call site",
+)
+_redis_commands_histogram = _meter.create_histogram(
+    name="arcade.redis.client.commands",
+    description="redis commands (pipelined or not) sent to handle a single request by call site",
+)
+
+
+class _CallSiteStats:
+    def __init__(self, call_site: str) -> None:
+        self.call_site = call_site
+        self.redis_commands = 0
+        self.redis_round_trips: list[tuple[str, float]] = []
+
+
+_call_site_stats: ContextVar[_CallSiteStats | None] = ContextVar("call_site_stats", default=None)
+
+
+def _record_redis_round_trip(operation: str, commands: int, start: float) -> None:
+    duration = (time.perf_counter() - start) * 1000
+
+    stats = _call_site_stats.get()
+    if stats is None:
+        _redis_duration_histogram.record(
+            amount=duration,
+            attributes={"call_site": BACKGROUND_CALL_SITE, "operation": operation},
+        )
+        return
+
+    stats.redis_commands += commands
+    stats.redis_round_trips.append((operation, duration))
+
+
+def start_call_site(call_site: str) -> Any:
+    return _call_site_stats.set(_CallSiteStats(call_site=call_site))
+
+
+def finish_call_site(token: Any) -> None:
+    stats = _call_site_stats.get()
+    _call_site_stats.reset(token)
+
+    if stats is None:
+        return
+
+    attributes = {"call_site": stats.call_site}
+
+    for operation, duration in stats.redis_round_trips:
+        _redis_duration_histogram.record(
+            amount=duration, attributes={**attributes, "operation": operation}
+        )
+
+    _redis_round_trips_histogram.record(amount=len(stats.redis_round_trips), attributes=attributes)
+    _redis_commands_histogram.record(amount=stats.redis_commands, attributes=attributes)
+
+
+def init_app(app: Flask) -> None:
+    @app.before_request
+    def _start_call_site() -> None:
+        g.call_site_token = start_call_site(call_site=request.endpoint or "unknown")
+
+    @app.teardown_request
+    def _finish_call_site(_: BaseException | None) -> None:
+        token = g.pop("call_site_token", None)
+        if token is not None:
+            finish_call_site(token=token)
+
+
+def track_call_site(handler: Callable) -> Callable:
+    # the asgi equivalent of init_app, for the natively async routes
+    call_site = f"asgi.{handler.__name__}"
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        token = start_call_site(call_site=call_site)
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            finish_call_site(token=token)
+
+    return wrapper
+
+
+class InstrumentedPipeline(Pipeline):
+    def execute(self, raise_on_error: bool = True) -> list:
+        commands = len(self)
+        if not commands:
+            return super().execute(raise_on_error=raise_on_error)
+
+        start = time.perf_counter()
+        try:
+            return super().execute(raise_on_error=raise_on_error)
+        finally:
+            _record_redis_round_trip(operation="pipeline", commands=commands, start=start)
+
+
+class InstrumentedRedis(StrictRedis):
+    def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            _record_redis_round_trip(operation=str(args[0]).lower(), commands=1, start=start)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Any = None) -> InstrumentedPipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+class InstrumentedAsyncPipeline(AsyncPipeline):
+    async def execute(self, raise_on_error: bool = True) -> list:
+        commands = len(self)
+        if not commands:
+            return await super().execute(raise_on_error=raise_on_error)
+
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error=raise_on_error)
+        finally:
+            _record_redis_round_trip(operation="pipeline", commands=commands, start=start)
+
+
+class InstrumentedAsyncRedis(AsyncStrictRedis):
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            _record_redis_round_trip(operation=str(args[0]).lower(), commands=1, start=start)
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: Any = None
+    ) -> InstrumentedAsyncPipeline:
+        return InstrumentedAsyncPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+# cluster mode (see cache.py) versions of the above, reported the same way
+
+
+# no state of our own, so these keep the base classes' memory layout and a pipeline the base
+# class built can be switched over to them (see pipeline below)
+class InstrumentedClusterPipeline(ClusterPipeline):
+    __slots__ = ()
+
+    def execute(self, raise_on_error: bool = True) -> list:
+        commands = len(self)
+        if not commands:
+            return super().execute(raise_on_error=raise_on_error)
+
+        start = time.perf_counter()
+        try:
+            return super().execute(raise_on_error=raise_on_error)
+        finally:
+            _record_redis_round_trip(operation="pipeline", commands=commands, start=start)
+
+
+class InstrumentedRedisCluster(RedisCluster):
+    def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            _record_redis_round_trip(operation=str(args[0]).lower(), commands=1, start=start)
+
+    def pipeline(self, transaction: Any = None, shard_hint: Any = None) -> ClusterPipeline:
+        # the base class knows how to build a pipeline that shares our cluster state (and which
+        # arguments this redis-py version wants for it), we only swap in the instrumented execute
+        pipeline = super().pipeline(transaction=transaction, shard_hint=shard_hint)
+        pipeline.__class__ = InstrumentedClusterPipeline
+
+        return pipeline
+
+
+class InstrumentedAsyncClusterPipeline(AsyncClusterPipeline):
+    __slots__ = ()
+
+    async def execute(self, raise_on_error: bool = True, **kwargs) -> list:
+        commands = len(self)
+        if not commands:
+            return await super().execute(raise_on_error=raise_on_error, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error=raise_on_error, **kwargs)
+        finally:
+            _record_redis_round_trip(operation="pipeline", commands=commands, start=start)
+
+
+class InstrumentedAsyncRedisCluster(AsyncRedisCluster):
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            _record_redis_round_trip(operation=str(args[0]).lower(), commands=1, start=start)
+
+    def pipeline(self, transaction: Any = None, shard_hint: Any = None) -> AsyncClusterPipeline:
+        pipeline = super().pipeline(transaction=transaction, shard_hint=shard_hint)
+        pipeline.__class__ = InstrumentedAsyncClusterPipeline
+
+        return pipeline
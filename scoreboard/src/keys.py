@@ -0,0 +1,123 @@
+import hashlib
+import os
+import zlib
+
+from src.cache import REDIS_CLUSTER_MODE
+
+# every key the scoreboard reads/writes is built here so the layout lives in one place
+
+# each arcade event (workshop) gets its own slice of the keyspace so scans only ever walk the
+# current event, and a past event can be archived or dropped as a unit (everything under
+# event:<id>:*). portal and player-content prefix their keys the same way. unset keeps the
+# original flat layout.
+EVENT_ID = os.getenv("EVENT_ID", "")
+EVENT_KEY_PREFIX = "event:"
+
+
+def get_event_namespace(event_id: str) -> str:
+    return f"{EVENT_KEY_PREFIX}{event_id}:" if event_id else ""
+
+
+def namespaced(key: str) -> str:
+    return f"{get_event_namespace(event_id=EVENT_ID)}{key}"
+
+
+# redis cluster only runs a multi key command or script when all of its keys hash to the same slot,
+# and when a key has a {...} hash tag only the tag is hashed. in cluster mode everything that
+# belongs to a player carries the player name as its tag, so the keys one write touches (a quiz
+# answer, its seen questions and progression) always live together while players still spread
+# over the cluster. the aggregates players feed (leaderboards, totals, the event stream) are split
+# into AGGREGATE_SHARDS shards by player, each shard under a tag of its own, so aggregate writes
+# spread over the cluster too and readers merge the shards. a single redis keeps the original
+# untagged, unsharded layout.
+AGGREGATE_SHARDS = int(os.getenv("AGGREGATE_SHARDS", "16")) if REDIS_CLUSTER_MODE else 1
+
+
+def get_player_hash_tag(player_name: str) -> str:
+    return f"{{{player_name}}}" if REDIS_CLUSTER_MODE else player_name
+
+
+def get_aggregate_shard(player_name: str) -> int:
+    # crc32 rather than hash() so every replica (and the event worker) agrees on the shard
+    return zlib.crc32(player_name.encode("utf-8")) % AGGREGATE_SHARDS
+
+
+def _aggregate_key(name: str, shard: int, *parts: str) -> str:
+    tag = [f"{{aggregates:{shard}}}"] if REDIS_CLUSTER_MODE else []
+    return namespaced(":".join([name, *tag, *parts]))
+
+
+def get_question_hash(question: str) -> str:
+    sha256_hash = hashlib.sha256()
+    sha256_hash.update(question.encode("utf-8"))
+
+    return sha256_hash.hexdigest()
+
+
+def get_game_score_key(player_name: str, title: str, game_session_id: str) -> str:
+    return namespaced(
+        f"scores:{get_player_hash_tag(player_name=player_name)}:{title}:{game_session_id}"
+    )
+
+
+def get_quiz_key(player_name: str, title: str, game_session_id: str, question: str) -> str:
+    return namespaced(
+        f"quiz:{get_player_hash_tag(player_name=player_name)}:{title}:{game_session_id}:"
+        f"{get_question_hash(question=question)}"
+    )
+
+
+def get_player_quiz_pattern(player_name: str) -> str:
+    return namespaced(f"quiz:{get_player_hash_tag(player_name=escape_pattern(player_name))}:*")
+
+
+def get_game_leaderboard_key(title: str, shard: int) -> str:
+    return _aggregate_key("leaderboard", shard, title)
+
+
+# the titles that have a leaderboard in the shard
+def get_game_titles_key(shard: int) -> str:
+    return _aggregate_key("titles", shard)
+
+
+def get_game_leaderboard_member(player_name: str, game_session_id: str) -> str:
+    return f"{player_name}:{game_session_id}"
+
+
+# per player running totals, across all titles (title=None) or for a single title. members are
+# player names
+def get_player_game_totals_key(shard: int, title: str | None = None) -> str:
+    return _aggregate_key("totals", shard, *(["game"] if title is None else ["game", title]))
+
+
+def get_player_quiz_totals_key(shard: int, title: str | None = None) -> str:
+    return _aggregate_key("totals", shard, *(["quiz"] if title is None else ["quiz", title]))
+
+
+def get_player_progression_key(player_name: str) -> str:
+    return namespaced(f"progression:{get_player_hash_tag(player_name=player_name)}")
+
+
+def get_player_seen_questions_key(player_name: str, module: str) -> str:
+    return namespaced(f"seen_questions:{get_player_hash_tag(player_name=player_name)}:{module}")
+
+
+def get_feedback_key(question_hash: str) -> str:
+    return namespaced(f"feedback:{question_hash}")
+
+
+def get_event_stream_key(shard: int) -> str:
+    return _aggregate_key("events", shard)
+
+
+def get_purge_key(purge_id: str) -> str:
+    return namespaced(f"purge:{purge_id}")
+
+
+def escape_pattern(value: str) -> str:
+    # anything user controlled (player names, titles) that ends up in a scan pattern needs the
+    # glob characters escaped so one player can never match another player's keys
+    for char in ("\\", "*", "?", "[", "]"):
+        value = value.replace(char, f"\\{char}")
+
+    return value
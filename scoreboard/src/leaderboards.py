@@ -0,0 +1,213 @@
+import heapq
+import itertools
+import json
+import os
+from typing import Any
+
+from redis import StrictRedis
+
+from src.keys import (
+    AGGREGATE_SHARDS,
+    get_aggregate_shard,
+    get_game_leaderboard_key,
+    get_game_score_key,
+    get_game_titles_key,
+    get_player_game_totals_key,
+    get_player_quiz_totals_key,
+    namespaced,
+)
+
+LEADERBOARDS_KEY = namespaced("leaderboards")
+LEADERBOARDS_REFRESH_INTERVAL_SECONDS = int(
+    os.getenv("LEADERBOARDS_REFRESH_INTERVAL_SECONDS", "10")
+)
+LEADERBOARD_SIZE = 10
+
+
+def calculate_quiz_answer_score(
+    attempts: int,
+    time_taken: float,
+) -> float:
+    attempt_score = {1: 1.0, 2: 0.75, 3: 0.5, 4: 0.25}.get(attempts, 0)
+
+    time_score = max(0, min(1, 1 - (time_taken / 3600)))
+
+    total_score = (attempt_score + time_score) / 2
+
+    return round(total_score * 100)
+
+
+def calculate_blended_score(
+    game_score: int,
+    quiz_score: int,
+    max_game_score: int,
+):
+    game_weight = 0.6
+    quiz_weight = 0.4
+
+    normalized_game_score = game_score / max_game_score if max_game_score > 0 else 0
+
+    overall_score = (normalized_game_score * game_weight) + (quiz_score * quiz_weight)
+
+    return round(overall_score)
+
+
+def _top(scores: dict[str, dict[str, Any]]) -> list[dict[str, Any]]:
+    return sorted(
+        scores.values(),
+        key=lambda x: x["current_score"],
+        reverse=True,
+    )[:LEADERBOARD_SIZE]
+
+
+def _as_number(score: float) -> int | float:
+    return int(score) if score.is_integer() else score
+
+
+def _totals_board(totals: list[tuple[str, float]]) -> list[dict[str, Any]]:
+    return [
+        {"player_name": player_name, "current_score": _as_number(score)}
+        for player_name, score in totals
+    ]
+
+
+def _top_totals(totals: list[tuple[str, float]]) -> list[tuple[str, float]]:
+    return heapq.nlargest(LEADERBOARD_SIZE, totals, key=lambda entry: entry[1])
+
+
+def _get_titles_by_shard(redis: StrictRedis) -> list[list[str]]:
+    pipeline = redis.pipeline(transaction=False)
+    for shard in range(AGGREGATE_SHARDS):
+        pipeline.smembers(get_game_titles_key(shard=shard))
+
+    return [sorted(titles) for titles in pipeline.execute()]
+
+
+def _add_top_titles(
+    redis: StrictRedis, board: list[dict[str, Any]], titles_by_shard: list[list[str]]
+) -> None:
+    # the title a player has scored the most in
+    pipeline = redis.pipeline(transaction=False)
+    for score_entry in board:
+        shard = get_aggregate_shard(player_name=score_entry["player_name"])
+        for title in titles_by_shard[shard]:
+            pipeline.zscore(
+                get_player_game_totals_key(shard=shard, title=title), score_entry["player_name"]
+            )
+    scores = iter(pipeline.execute())
+
+    for score_entry in board:
+        titles = titles_by_shard[get_aggregate_shard(player_name=score_entry["player_name"])]
+        title_scores = [(next(scores) or 0, title) for title in titles]
+        score_entry["title"] = max(title_scores, default=(0, ""))[1]
+
+
+def _top_sessions(
+    redis: StrictRedis, titles_by_shard: list[list[str]]
+) -> list[tuple[str, str, float]]:
+    # every title's leaderboard (in every shard) already has its sessions ordered by high score,
+    # so the top sessions overall are among the tops of those
+    shard_titles = [
+        (shard, title) for shard, titles in enumerate(titles_by_shard) for title in titles
+    ]
+
+    pipeline = redis.pipeline(transaction=False)
+    for shard, title in shard_titles:
+        pipeline.zrevrange(
+            get_game_leaderboard_key(title=title, shard=shard),
+            0,
+            LEADERBOARD_SIZE - 1,
+            withscores=True,
+        )
+
+    return heapq.nlargest(
+        LEADERBOARD_SIZE,
+        (
+            (title, member, score)
+            for (_, title), top in zip(shard_titles, pipeline.execute())
+            for member, score in top
+        ),
+        key=lambda entry: entry[2],
+    )
+
+
+def compute_leaderboards(redis: StrictRedis) -> dict[str, list[dict[str, Any]]]:
+    titles_by_shard = _get_titles_by_shard(redis=redis)
+    top_sessions = _top_sessions(redis=redis, titles_by_shard=titles_by_shard)
+
+    # only the sessions that make the board get looked up, for the version they were played on
+    pipeline = redis.pipeline(transaction=False)
+    high_scores_per_game_session = []
+    for title, member, score in top_sessions:
+        # session ids are uuids, so the last colon always splits off the session id
+        player_name, _, game_session_id = member.rpartition(":")
+        pipeline.hmget(
+            get_game_score_key(
+                player_name=player_name, title=title, game_session_id=game_session_id
+            ),
+            "version",
+        )
+        high_scores_per_game_session.append(
+            {
+                "title": title,
+                "version": "",
+                "player_name": player_name,
+                "current_score": _as_number(score),
+            }
+        )
+    for score_entry, (version,) in zip(high_scores_per_game_session, pipeline.execute()):
+        # the session record may have expired since, its high score outlives it
+        score_entry["version"] = version or ""
+
+    # the cumulative and quiz totals are kept up to date as scores are recorded (see scripts.py),
+    # so those boards are just the top of a sorted set -- of each shard's sorted set, players only
+    # ever land in the one shard (see keys.py). blending needs every player's totals
+    pipeline = redis.pipeline(transaction=False)
+    for shard in range(AGGREGATE_SHARDS):
+        pipeline.zrange(get_player_game_totals_key(shard=shard), 0, -1, withscores=True)
+        pipeline.zrange(get_player_quiz_totals_key(shard=shard), 0, -1, withscores=True)
+    results = pipeline.execute()
+    game_totals = list(itertools.chain.from_iterable(results[0::2]))
+    quiz_totals = list(itertools.chain.from_iterable(results[1::2]))
+
+    top_cumulative = _top_totals(totals=game_totals)
+    top_quiz = _top_totals(totals=quiz_totals)
+
+    high_scores_cumulative = _totals_board(totals=top_cumulative)
+    _add_top_titles(redis=redis, board=high_scores_cumulative, titles_by_shard=titles_by_shard)
+
+    quiz_totals = dict(quiz_totals)
+    max_game_score = max(quiz_totals.values(), default=0)
+
+    high_scores_blended = {}
+    for player_name, game_total in game_totals:
+        high_scores_blended[player_name] = {
+            "player_name": player_name,
+            "current_score": calculate_blended_score(
+                game_score=game_total,
+                quiz_score=quiz_totals.get(player_name, 0),
+                max_game_score=max_game_score,
+            ),
+        }
+
+    return {
+        "per_game_session": high_scores_per_game_session,
+        "cumulative": high_scores_cumulative,
+        "quiz": _totals_board(totals=top_quiz),
+        "blended": _top(scores=high_scores_blended),
+    }
+
+
+def get_leaderboards(redis: StrictRedis) -> dict[str, list[dict[str, Any]]]:
+    # the materialized copy lives in redis (not in process) so every replica serves the same
+    # boards and the full recompute happens at most about once per interval no matter how many
+    # viewers there are
+    cached = redis.get(LEADERBOARDS_KEY)
+    if cached:
+        return json.loads(cached)
+
+    leaderboards = compute_leaderboards(redis=redis)
+
+    redis.set(LEADERBOARDS_KEY, json.dumps(leaderboards), ex=LEADERBOARDS_REFRESH_INTERVAL_SECONDS)
+
+    return leaderboards
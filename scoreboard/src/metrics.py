@@ -1,8 +1,80 @@
+import os
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from typing import Any, Optional
 
 from opentelemetry import metrics
 
+# every distinct player_name is a new time series on every instrument, so this controls how
+# player_name is attached: "all" tags every data point with the player as is, "top_k" keeps up to
+# METRICS_PLAYER_TOP_K of the most recently active players as their own series and folds everyone
+# else into "other". a player who has sent nothing for METRICS_PLAYER_IDLE_SECONDS gives up their
+# slot to the next new player
+METRICS_PLAYER_NAME_MODE = os.getenv("METRICS_PLAYER_NAME_MODE", "all")
+METRICS_PLAYER_TOP_K = int(os.getenv("METRICS_PLAYER_TOP_K", "50"))
+METRICS_PLAYER_IDLE_SECONDS = float(os.getenv("METRICS_PLAYER_IDLE_SECONDS", "600"))
+# comma separated instruments (score, projectiles, level, duration) that never get player_name
+METRICS_DROP_PLAYER_NAME = {
+    instrument.strip()
+    for instrument in os.getenv("METRICS_DROP_PLAYER_NAME", "").split(",")
+    if instrument.strip()
+}
+# record scores into a per game histogram (without player_name) instead of per player gauges
+METRICS_SCORE_HISTOGRAM_ENABLED = (
+    os.getenv("METRICS_SCORE_HISTOGRAM_ENABLED", "false").lower() == "true"
+)
+
+OTHER_PLAYERS = "other"
+
+
+class PlayerNameLimiter:
+    # players ordered by when they were last seen, least recent first. a slot is only taken back
+    # once its player has gone idle, so active players never flap between their own series and
+    # "other". the sdk still holds on to an evicted player's series, but it stops changing, so
+    # what is live at any time stays at max_players
+    def __init__(self, max_players: int, idle_seconds: float) -> None:
+        self._max_players = max_players
+        self._idle_seconds = idle_seconds
+        self._last_seen: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def limit(self, player_name: str) -> str:
+        now = time.monotonic()
+
+        with self._lock:
+            if player_name in self._last_seen:
+                self._last_seen[player_name] = now
+                self._last_seen.move_to_end(player_name)
+                return player_name
+
+            if len(self._last_seen) >= self._max_players:
+                least_recent_player, last_seen = next(iter(self._last_seen.items()))
+                if now - last_seen < self._idle_seconds:
+                    return OTHER_PLAYERS
+
+                del self._last_seen[least_recent_player]
+
+            self._last_seen[player_name] = now
+            return player_name
+
+
+PLAYER_NAME_LIMITER = (
+    PlayerNameLimiter(max_players=METRICS_PLAYER_TOP_K, idle_seconds=METRICS_PLAYER_IDLE_SECONDS)
+    if METRICS_PLAYER_NAME_MODE == "top_k"
+    else None
+)
+
+
+def limit_player_name(game_data: dict[str, Any]) -> dict[str, Any]:
+    # resolved once per event, every instrument the event is recorded into then reuses it
+    if PLAYER_NAME_LIMITER is None:
+        return game_data
+
+    player_name = game_data.get("player_name", "unknown")
+    return {**game_data, "player_name": PLAYER_NAME_LIMITER.limit(player_name=player_name)}
+
 
 class Metrics(ABC):
     def __init__(self, name: str) -> None:
@@ -14,6 +86,37 @@ class Metrics(ABC):
             name=f"arcade.{self.name}.score",
             description=f"score for the game `{self.name}`",
         )
+        self.score_histogram = self.meter.create_histogram(
+            name=f"arcade.{self.name}.score.distribution",
+            description=f"distribution of scores for the game `{self.name}`",
+        )
+
+    def attributes(self, game_data: dict[str, Any], instrument: str) -> dict[str, Any]:
+        attributes = {
+            "title": self.name,
+            "version": game_data.get("version", "unknown"),
+        }
+
+        if instrument in METRICS_DROP_PLAYER_NAME:
+            return attributes
+
+        # already limited, see limit_player_name
+        attributes["player_name"] = game_data.get("player_name", "unknown")
+
+        return attributes
+
+    def record_score(self, game_data: dict[str, Any]) -> None:
+        score = game_data.get("current_score", 0)
+
+        if METRICS_SCORE_HISTOGRAM_ENABLED:
+            self.score_histogram.record(
+                amount=score,
+                attributes={"title": self.name, "version": game_data.get("version", "unknown")},
+            )
+        else:
+            self.score_gauge.set(
+                amount=score, attributes=self.attributes(game_data=game_data, instrument="score")
+            )
 
     @abstractmethod
     def process(self, game_data: dict[str, Any]) -> None:
@@ -53,23 +156,25 @@ class ImvadersMetrics(Metrics):
         self.initialized = True
 
     def process(self, game_data: dict[str, Any]) -> None:
-        attributes = {
-            "title": self.name,
-            "version": game_data.get("version", "unknown"),
-            "player_name": game_data.get("player_name", "unknown"),
-        }
-
         values = {
-            "score": game_data.get("current_score", 0),
             "projectiles": game_data.get("projectiles", 0),
             "duration": game_data.get("duration", 0),
             "level": game_data.get("level", 0),
         }
 
-        self.score_gauge.set(amount=values["score"], attributes=attributes)
-        self.projectile_counter.add(amount=values["projectiles"], attributes=attributes)
-        self.level_counter.add(amount=values["level"], attributes=attributes)
-        self.duration_counter.add(amount=values["duration"], attributes=attributes)
+        self.record_score(game_data=game_data)
+        self.projectile_counter.add(
+            amount=values["projectiles"],
+            attributes=self.attributes(game_data=game_data, instrument="projectiles"),
+        )
+        self.level_counter.add(
+            amount=values["level"],
+            attributes=self.attributes(game_data=game_data, instrument="level"),
+        )
+        self.duration_counter.add(
+            amount=values["duration"],
+            attributes=self.attributes(game_data=game_data, instrument="duration"),
+        )
 
 
 class LoggerMetrics(Metrics):
@@ -90,16 +195,7 @@ class LoggerMetrics(Metrics):
         self.initialized = True
 
     def process(self, game_data: dict[str, Any]) -> None:
-        values = {
-            "score": game_data.get("current_score", 0),
-        }
-        attributes = {
-            "title": self.name,
-            "version": game_data.get("version", "unknown"),
-            "player_name": game_data.get("player_name", "unknown"),
-        }
-
-        self.score_gauge.set(amount=values["score"], attributes=attributes)
+        self.record_score(game_data=game_data)
 
 
 class BughuntMetrics(Metrics):
@@ -120,16 +216,7 @@ class BughuntMetrics(Metrics):
         self.initialized = True
 
     def process(self, game_data: dict[str, Any]) -> None:
-        values = {
-            "score": game_data.get("current_score", 0),
-        }
-        attributes = {
-            "title": self.name,
-            "version": game_data.get("version", "unknown"),
-            "player_name": game_data.get("player_name", "unknown"),
-        }
-
-        self.score_gauge.set(amount=values["score"], attributes=attributes)
+        self.record_score(game_data=game_data)
 
 
 def metric_factory(name: str) -> Metrics:
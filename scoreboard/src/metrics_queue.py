@@ -0,0 +1,52 @@
+import threading
+from collections import deque
+from typing import Any
+
+from opentelemetry import metrics
+
+from src.metrics import metric_factory
+
+
+class MetricsQueue:
+    # game metrics are applied by a background worker rather than while the request waits. the
+    # queue is bounded and drops the oldest events when the worker cant keep up -- games post their
+    # full state every tick, so a newer event for a session supersedes anything we would drop.
+    def __init__(self, max_size: int) -> None:
+        self._events: deque[dict[str, Any]] = deque(maxlen=max_size)
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+        self._dropped_counter = metrics.get_meter("scoreboard.metrics_queue").create_counter(
+            name="arcade.metrics_queue.dropped",
+            description="game metric events dropped because the metrics queue was full",
+        )
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(target=self._run, name="metrics-queue", daemon=True)
+        self._thread.start()
+
+    def submit(self, game_data: dict[str, Any]) -> None:
+        with self._condition:
+            self._ensure_started()
+
+            dropped = len(self._events) == self._events.maxlen
+            # a full deque with a maxlen discards from the opposite end on append
+            self._events.append(game_data)
+            self._condition.notify()
+
+        if dropped:
+            self._dropped_counter.add(amount=1)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._events)
+                game_data = self._events.popleft()
+
+            try:
+                metric_factory(name=game_data["title"]).process(game_data=game_data)
+            except Exception as e:
+                print(f"ignoring metrics exception: {e}")
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from redis import StrictRedis
+
+from src.cache import new_redis_conn
+from src.keys import namespaced
+
+# channels arent keys, but replicas serving another event have no business hearing about ours
+PROGRESSION_INVALIDATION_CHANNEL = namespaced("progression:invalidate")
+# published instead of a player name when every player's progression may have changed
+ALL_PLAYERS = "*"
+SUBSCRIBER_RETRY_SECONDS = 1
+# poll rather than block forever on listen() so the read never trips the pool's socket timeout
+SUBSCRIBER_POLL_SECONDS = 1
+
+
+def publish_progression_invalidation(redis: StrictRedis, player_name: str) -> None:
+    redis.publish(PROGRESSION_INVALIDATION_CHANNEL, player_name)
+
+
+class ProgressionCache:
+    # per replica lru of computed player progression. progression only changes when a player
+    # answers a question (or resets), and those writes publish the player name on the
+    # invalidation channel, so every replica drops its copy right away. if we ever lose the
+    # subscription we stop serving from the cache until we are subscribed again, since we could
+    # have missed invalidations in the meantime.
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+        # bumped on every invalidation; a value computed while an invalidation happened is never
+        # cached since it may have been read before the write landed
+        self._generation = 0
+        self._subscribed = False
+
+        self._thread: threading.Thread | None = None
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(
+            target=self._run, name="progression-cache-invalidation", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                pubsub = new_redis_conn().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(PROGRESSION_INVALIDATION_CHANNEL)
+
+                with self._lock:
+                    self._entries.clear()
+                    self._subscribed = True
+
+                while True:
+                    message = pubsub.get_message(timeout=SUBSCRIBER_POLL_SECONDS)
+                    if message is not None:
+                        self.invalidate(player_name=message["data"])
+            except Exception as e:
+                print(f"progression cache subscriber exception, retrying: {e}")
+
+            with self._lock:
+                self._subscribed = False
+                self._entries.clear()
+                self._generation += 1
+
+            time.sleep(SUBSCRIBER_RETRY_SECONDS)
+
+    def generation(self) -> int:
+        with self._lock:
+            self._ensure_started()
+
+            return self._generation
+
+    def get(self, player_name: str) -> dict[str, Any] | None:
+        with self._lock:
+            if not self._subscribed:
+                return None
+
+            progression = self._entries.get(player_name)
+            if progression is not None:
+                self._entries.move_to_end(player_name)
+
+            return progression
+
+    def put(self, player_name: str, progression: dict[str, Any], generation: int) -> None:
+        with self._lock:
+            if not self._subscribed or generation != self._generation:
+                return
+
+            self._entries[player_name] = progression
+            self._entries.move_to_end(player_name)
+
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, player_name: str) -> None:
+        with self._lock:
+            if player_name == ALL_PLAYERS:
+                self._entries.clear()
+            else:
+                self._entries.pop(player_name, None)
+
+            self._generation += 1
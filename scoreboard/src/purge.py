@@ -0,0 +1,313 @@
+import os
+import threading
+import time
+import uuid
+from datetime import UTC, datetime
+
+from redis import StrictRedis
+from redis.cluster import RedisCluster
+
+from src.cache import new_redis_conn, scan_batches
+from src.event_log import QUIZ_SCORE_EVENT
+from src.keys import (
+    AGGREGATE_SHARDS,
+    escape_pattern,
+    get_aggregate_shard,
+    get_event_namespace,
+    get_event_stream_key,
+    get_game_leaderboard_key,
+    get_game_titles_key,
+    get_player_game_totals_key,
+    get_player_hash_tag,
+    get_player_progression_key,
+    get_player_quiz_totals_key,
+    get_purge_key,
+    namespaced,
+)
+from src.leaderboards import LEADERBOARDS_KEY
+from src.progression_cache import ALL_PLAYERS, publish_progression_invalidation
+
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "500"))
+# pause between batches so a big purge trickles through redis instead of hogging it
+PURGE_BATCH_INTERVAL_SECONDS = float(os.getenv("PURGE_BATCH_INTERVAL_SECONDS", "0.05"))
+# how long we keep the progress record of a finished purge around
+PURGE_STATUS_TTL_SECONDS = 86400
+
+PURGE_SCOPE_PLAYER = "player"
+PURGE_SCOPE_TITLE = "title"
+PURGE_SCOPE_ALL = "all"
+# drops a whole (usually past) event, value is its event id
+PURGE_SCOPE_EVENT = "event"
+PURGE_SCOPES = (PURGE_SCOPE_PLAYER, PURGE_SCOPE_TITLE, PURGE_SCOPE_ALL, PURGE_SCOPE_EVENT)
+
+
+def unlink_matching(
+    redis: StrictRedis | RedisCluster, match: str, progress_key: str | None = None
+) -> int:
+    # scan + unlink one batch at a time; unlink frees the memory in the background on the redis
+    # side so even big hashes dont block other clients. one unlink per key since the keys of a
+    # batch can belong to different cluster slots
+    unlinked = 0
+
+    for keys in scan_batches(redis=redis, match=match, batch_size=PURGE_BATCH_SIZE):
+        if unlinked:
+            time.sleep(PURGE_BATCH_INTERVAL_SECONDS)
+
+        pipeline = redis.pipeline(transaction=False)
+        for key in keys:
+            pipeline.unlink(key)
+        if progress_key:
+            pipeline.hincrby(progress_key, "keys_deleted", len(keys))
+        pipeline.execute()
+
+        unlinked += len(keys)
+
+    return unlinked
+
+
+def _remove_from_leaderboards(redis: StrictRedis, player_name: str, progress_key: str) -> None:
+    # a player's sessions only ever land in the player's own aggregates shard (see keys.py)
+    shard = get_aggregate_shard(player_name=player_name)
+
+    for leaderboard_key in redis.scan_iter(match=get_game_leaderboard_key(title="*", shard=shard)):
+        members = [
+            member
+            for member, _ in redis.zscan_iter(
+                leaderboard_key, match=f"{escape_pattern(player_name)}:*", count=PURGE_BATCH_SIZE
+            )
+        ]
+
+        for offset in range(0, len(members), PURGE_BATCH_SIZE):
+            batch = members[offset : offset + PURGE_BATCH_SIZE]
+
+            pipeline = redis.pipeline(transaction=False)
+            pipeline.zrem(leaderboard_key, *batch)
+            pipeline.hincrby(progress_key, "members_deleted", len(batch))
+            pipeline.execute()
+
+            time.sleep(PURGE_BATCH_INTERVAL_SECONDS)
+
+
+def _remove_player_from_totals(redis: StrictRedis, player_name: str) -> None:
+    pipeline = redis.pipeline(transaction=False)
+    for totals_key in redis.scan_iter(match=namespaced("totals:*")):
+        pipeline.zrem(totals_key, player_name)
+    pipeline.execute()
+
+
+def _remove_title_from_totals(redis: StrictRedis, title: str) -> None:
+    # the overall totals include whatever players scored in this title, take that back out before
+    # dropping the per title totals
+    for get_totals_key in (get_player_game_totals_key, get_player_quiz_totals_key):
+        for shard in range(AGGREGATE_SHARDS):
+            title_totals_key = get_totals_key(shard=shard, title=title)
+
+            pipeline = redis.pipeline(transaction=False)
+            for player_name, score in redis.zscan_iter(title_totals_key, count=PURGE_BATCH_SIZE):
+                pipeline.zincrby(get_totals_key(shard=shard), -score, player_name)
+            pipeline.unlink(title_totals_key)
+            pipeline.execute()
+
+
+def _remove_title_from_progression(redis: StrictRedis | RedisCluster, title: str) -> None:
+    batches = scan_batches(
+        redis=redis, match=get_player_progression_key(player_name="*"), batch_size=PURGE_BATCH_SIZE
+    )
+
+    for index, keys in enumerate(batches):
+        if index:
+            time.sleep(PURGE_BATCH_INTERVAL_SECONDS)
+
+        pipeline = redis.pipeline(transaction=False)
+        for key in keys:
+            pipeline.hdel(key, title)
+        pipeline.execute()
+
+
+def remove_from_event_stream(
+    redis: StrictRedis,
+    shard: int,
+    match: dict[str, str],
+    end: str = "+",
+    progress_key: str | None = None,
+) -> None:
+    # otherwise a replay of the event stream would bring the purged data right back. removes the
+    # events (up to end) whose fields have all the values in match
+    stream_key = get_event_stream_key(shard=shard)
+    start = "-"
+
+    while True:
+        entries = redis.xrange(stream_key, min=start, max=end, count=PURGE_BATCH_SIZE)
+        if not entries:
+            return
+
+        entry_ids = [
+            entry_id
+            for entry_id, event in entries
+            if all(event.get(field) == value for field, value in match.items())
+        ]
+
+        if entry_ids:
+            pipeline = redis.pipeline(transaction=False)
+            pipeline.xdel(stream_key, *entry_ids)
+            if progress_key:
+                pipeline.hincrby(progress_key, "events_deleted", len(entry_ids))
+            pipeline.execute()
+
+            time.sleep(PURGE_BATCH_INTERVAL_SECONDS)
+
+        # exclusive range start, carry on right after the last entry we looked at
+        start = f"({entries[-1][0]}"
+
+
+def _remove_player_quiz_events(player_name: str, end: str) -> None:
+    try:
+        remove_from_event_stream(
+            redis=new_redis_conn(),
+            shard=get_aggregate_shard(player_name=player_name),
+            match={"type": QUIZ_SCORE_EVENT, "player_name": player_name},
+            end=end,
+        )
+    except Exception as e:
+        print(f"ignoring quiz event removal exception: {e}")
+
+
+def start_player_quiz_events_removal(player_name: str) -> None:
+    # a quiz reset drops the player's quiz events too, in the background like a purge since the
+    # stream can be long. only events up to now, answers after the reset stay (stream ids start
+    # with the millisecond they were added at)
+    end = str(int(time.time() * 1000))
+
+    threading.Thread(
+        target=_remove_player_quiz_events,
+        args=(player_name, end),
+        name=f"quiz-reset-{player_name}",
+        daemon=True,
+    ).start()
+
+
+def _purge_patterns(scope: str, value: str) -> list[str]:
+    value = escape_pattern(value)
+
+    if scope == PURGE_SCOPE_EVENT:
+        # everything an event wrote lives under its namespace
+        return [f"{get_event_namespace(event_id=value)}*"]
+
+    if scope == PURGE_SCOPE_PLAYER:
+        # player keys carry the player name as their hash tag (see keys.py)
+        player = get_player_hash_tag(player_name=value)
+        patterns = [
+            f"scores:{player}:*",
+            f"quiz:{player}:*",
+            f"seen_questions:{player}:*",
+            f"progression:{player}",
+            f"content:quiz:*:{player}:*",
+            f"persist:content:quiz:*:{player}:*",
+        ]
+    elif scope == PURGE_SCOPE_TITLE:
+        patterns = [
+            f"scores:*:{value}:*",
+            f"quiz:*:{value}:*",
+            f"seen_questions:*:{value}",
+            f"content:quiz:{value}:*",
+            f"persist:content:quiz:{value}:*",
+        ]
+        # the title leaderboards are spread over the aggregates shards (and namespaced already)
+        return [namespaced(pattern) for pattern in patterns] + [
+            get_game_leaderboard_key(title=value, shard=shard) for shard in range(AGGREGATE_SHARDS)
+        ]
+    else:
+        patterns = [
+            "scores:*",
+            "quiz:*",
+            "seen_questions:*",
+            "progression:*",
+            "leaderboard:*",
+            "feedback:*",
+            "totals:*",
+            "events*",
+            "titles*",
+            "content:quiz:*",
+            "persist:content:quiz:*",
+        ]
+
+    return [namespaced(pattern) for pattern in patterns]
+
+
+def _run_purge(purge_id: str, scope: str, value: str) -> None:
+    redis = new_redis_conn()
+    progress_key = get_purge_key(purge_id=purge_id)
+
+    try:
+        for pattern in _purge_patterns(scope=scope, value=value):
+            redis.hset(progress_key, "current_pattern", pattern)
+            unlink_matching(redis=redis, match=pattern, progress_key=progress_key)
+
+        if scope == PURGE_SCOPE_PLAYER:
+            _remove_from_leaderboards(redis=redis, player_name=value, progress_key=progress_key)
+            _remove_player_from_totals(redis=redis, player_name=value)
+            remove_from_event_stream(
+                redis=redis,
+                shard=get_aggregate_shard(player_name=value),
+                match={"player_name": value},
+                progress_key=progress_key,
+            )
+        elif scope == PURGE_SCOPE_TITLE:
+            _remove_title_from_progression(redis=redis, title=value)
+            _remove_title_from_totals(redis=redis, title=value)
+            for shard in range(AGGREGATE_SHARDS):
+                redis.srem(get_game_titles_key(shard=shard), value)
+            for shard in range(AGGREGATE_SHARDS):
+                remove_from_event_stream(
+                    redis=redis, shard=shard, match={"title": value}, progress_key=progress_key
+                )
+
+        # the materialized boards and any cached progression are now stale
+        redis.unlink(LEADERBOARDS_KEY)
+        publish_progression_invalidation(
+            redis=redis, player_name=value if scope == PURGE_SCOPE_PLAYER else ALL_PLAYERS
+        )
+
+        redis.hset(progress_key, mapping={"status": "complete", "current_pattern": ""})
+    except Exception as e:
+        print(f"purge {purge_id} failed: {e}")
+        redis.hset(progress_key, mapping={"status": "failed", "error": str(e)})
+
+    redis.hset(progress_key, "finished_at", datetime.now(UTC).isoformat())
+    redis.expire(progress_key, PURGE_STATUS_TTL_SECONDS)
+
+
+def start_purge(redis: StrictRedis, scope: str, value: str) -> str:
+    if scope not in PURGE_SCOPES:
+        raise ValueError(f"unknown purge scope '{scope}', expected one of {PURGE_SCOPES}")
+
+    if scope != PURGE_SCOPE_ALL and not value:
+        raise ValueError(f"purge scope '{scope}' requires a value")
+
+    purge_id = str(uuid.uuid4())
+
+    redis.hset(
+        get_purge_key(purge_id=purge_id),
+        mapping={
+            "purge_id": purge_id,
+            "scope": scope,
+            "value": value,
+            "status": "running",
+            "keys_deleted": 0,
+            "members_deleted": 0,
+            "started_at": datetime.now(UTC).isoformat(),
+        },
+    )
+
+    threading.Thread(
+        target=_run_purge,
+        args=(purge_id, scope, value),
+        name=f"purge-{purge_id}",
+        daemon=True,
+    ).start()
+
+    return purge_id
+
+
+def get_purge_status(redis: StrictRedis, purge_id: str) -> dict[str, str]:
+    return redis.hgetall(get_purge_key(purge_id=purge_id))
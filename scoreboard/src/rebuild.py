@@ -0,0 +1,162 @@
+from collections import defaultdict
+
+from redis import StrictRedis
+from redis.client import Pipeline
+from redis.cluster import RedisCluster
+
+from src.cache import SCAN_BATCH_SIZE, scan_hashes
+from src.keys import (
+    get_aggregate_shard,
+    get_game_leaderboard_key,
+    get_game_leaderboard_member,
+    get_game_titles_key,
+    get_player_game_totals_key,
+    get_player_progression_key,
+    get_player_quiz_totals_key,
+    get_player_seen_questions_key,
+    namespaced,
+)
+from src.leaderboards import LEADERBOARDS_KEY, calculate_quiz_answer_score
+from src.progression_cache import ALL_PLAYERS, publish_progression_invalidation
+
+# the title leaderboards, totals, progression counters and seen questions are only maintained as
+# scores are recorded, so anything recorded before they existed (an upgrade mid event) is missing
+# from them. this recomputes them from the score and quiz records themselves. it only ever adds
+# to what is there -- sorted sets via ZADD GT, counters only go up, sets only gain members -- so
+# running it again (or while scores are still coming in) never undoes a live write. the event
+# stream cant stand in for the records here, it is capped and only goes back so far.
+
+
+def _quiz_answer_score(quiz_record: dict[str, str]) -> float:
+    # records from before the answer score was stored with the answer get it worked out the same
+    # way the write does (see to_quiz_update)
+    if "answer_score" in quiz_record:
+        return float(quiz_record["answer_score"])
+
+    if quiz_record.get("source", "") != "static":
+        return 0
+
+    return calculate_quiz_answer_score(
+        attempts=int(quiz_record["attempts"]), time_taken=float(quiz_record["time_taken"])
+    )
+
+
+def _execute_when_full(pipeline: Pipeline) -> None:
+    # keeps any one round trip (and what it holds on either end) to a batch worth of commands
+    if len(pipeline) >= SCAN_BATCH_SIZE:
+        pipeline.execute()
+
+
+def _rebuild_game_aggregates(redis: StrictRedis | RedisCluster) -> int:
+    leaderboards = defaultdict(dict)
+    totals = defaultdict(float)
+    title_totals = defaultdict(float)
+    sessions = 0
+
+    for game_score in scan_hashes(redis=redis, match=namespaced("scores:*")):
+        if "current_score" not in game_score:
+            continue
+
+        try:
+            player_name, title = game_score["player_name"], game_score["title"]
+            current_score = float(game_score["current_score"])
+            member = get_game_leaderboard_member(
+                player_name=player_name, game_session_id=game_score["game_session_id"]
+            )
+        except (KeyError, ValueError) as e:
+            print(f"ignoring incomplete game session record, exception: {e}")
+            continue
+
+        leaderboards[(get_aggregate_shard(player_name=player_name), title)][member] = current_score
+        totals[player_name] += current_score
+        title_totals[(player_name, title)] += current_score
+        sessions += 1
+
+    pipeline = redis.pipeline(transaction=False)
+    for (shard, title), members in leaderboards.items():
+        pipeline.sadd(get_game_titles_key(shard=shard), title)
+        pipeline.zadd(get_game_leaderboard_key(title=title, shard=shard), members, gt=True)
+        _execute_when_full(pipeline=pipeline)
+    for player_name, total in totals.items():
+        shard = get_aggregate_shard(player_name=player_name)
+        pipeline.zadd(get_player_game_totals_key(shard=shard), {player_name: total}, gt=True)
+        _execute_when_full(pipeline=pipeline)
+    for (player_name, title), total in title_totals.items():
+        shard = get_aggregate_shard(player_name=player_name)
+        pipeline.zadd(
+            get_player_game_totals_key(shard=shard, title=title), {player_name: total}, gt=True
+        )
+        _execute_when_full(pipeline=pipeline)
+    pipeline.execute()
+
+    return sessions
+
+
+def _rebuild_quiz_aggregates(redis: StrictRedis | RedisCluster) -> int:
+    question_counts = defaultdict(lambda: defaultdict(int))
+    seen_questions = defaultdict(set)
+    totals = defaultdict(float)
+    title_totals = defaultdict(float)
+    answers = 0
+
+    for quiz_record in scan_hashes(redis=redis, match=namespaced("quiz:*")):
+        try:
+            player_name, module = quiz_record["player_name"], quiz_record["title"]
+            question = quiz_record["question"]
+            answer_score = _quiz_answer_score(quiz_record=quiz_record)
+        except (KeyError, ValueError) as e:
+            print(f"ignoring incomplete quiz record, exception: {e}")
+            continue
+
+        # every record counted once toward progression when it was first written
+        question_counts[player_name][module] += 1
+        seen_questions[(player_name, module)].add(question)
+        totals[player_name] += answer_score
+        title_totals[(player_name, module)] += answer_score
+        answers += 1
+
+    # counters only go up, so only the ones that are behind get set
+    players = list(question_counts)
+    pipeline = redis.pipeline(transaction=False)
+    for player_name in players:
+        pipeline.hgetall(get_player_progression_key(player_name=player_name))
+    current_counts = dict(zip(players, pipeline.execute()))
+
+    for player_name, counts in question_counts.items():
+        behind = {
+            module: count
+            for module, count in counts.items()
+            if count > int(current_counts[player_name].get(module, 0))
+        }
+        if behind:
+            pipeline.hset(get_player_progression_key(player_name=player_name), mapping=behind)
+            _execute_when_full(pipeline=pipeline)
+    for (player_name, module), questions in seen_questions.items():
+        pipeline.sadd(
+            get_player_seen_questions_key(player_name=player_name, module=module), *questions
+        )
+        _execute_when_full(pipeline=pipeline)
+    for player_name, total in totals.items():
+        shard = get_aggregate_shard(player_name=player_name)
+        pipeline.zadd(get_player_quiz_totals_key(shard=shard), {player_name: total}, gt=True)
+        _execute_when_full(pipeline=pipeline)
+    for (player_name, module), total in title_totals.items():
+        shard = get_aggregate_shard(player_name=player_name)
+        pipeline.zadd(
+            get_player_quiz_totals_key(shard=shard, title=module), {player_name: total}, gt=True
+        )
+        _execute_when_full(pipeline=pipeline)
+    pipeline.execute()
+
+    return answers
+
+
+def rebuild_aggregates(redis: StrictRedis | RedisCluster) -> tuple[int, int]:
+    sessions = _rebuild_game_aggregates(redis=redis)
+    answers = _rebuild_quiz_aggregates(redis=redis)
+
+    # the materialized boards and any cached progression are now stale
+    redis.unlink(LEADERBOARDS_KEY)
+    publish_progression_invalidation(redis=redis, player_name=ALL_PLAYERS)
+
+    return sessions, answers
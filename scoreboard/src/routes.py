@@ -1,11 +1,66 @@
-import hashlib
+import heapq
+import hmac
+import itertools
+import os
 import random
+from typing import Any
 
 from flask import Blueprint, abort, jsonify, request
 from opentelemetry import trace
-
-from src.cache import get_redis_conn
-from src.metrics import metric_factory
+from redis import StrictRedis
+from redis.client import Pipeline
+
+from src.cache import REDIS_CLUSTER_MODE, get_hashes, get_redis_conn, scan_hashes, scan_keys_page
+from src.event_log import EVENT_STREAM_MAX_LENGTH, get_event_stream_min_id
+from src.keys import (
+    AGGREGATE_SHARDS,
+    get_aggregate_shard,
+    get_event_stream_key,
+    get_feedback_key,
+    get_game_leaderboard_key,
+    get_game_leaderboard_member,
+    get_game_score_key,
+    get_game_titles_key,
+    get_player_game_totals_key,
+    get_player_progression_key,
+    get_player_quiz_pattern,
+    get_player_quiz_totals_key,
+    get_player_seen_questions_key,
+    get_question_hash,
+    get_quiz_key,
+    namespaced,
+)
+from src.leaderboards import calculate_quiz_answer_score, get_leaderboards
+from src.metrics import limit_player_name
+from src.metrics_queue import MetricsQueue
+from src.progression_cache import (
+    PROGRESSION_INVALIDATION_CHANNEL,
+    ProgressionCache,
+    publish_progression_invalidation,
+)
+from src.purge import (
+    get_purge_status,
+    start_player_quiz_events_removal,
+    start_purge,
+    unlink_matching,
+)
+from src.score_schema import encode_game_score, is_final_game_score, to_game_summary
+from src.scripts import (
+    RECORD_GAME_SCORE,
+    RECORD_GAME_SCORE_AGGREGATES,
+    RECORD_GAME_SESSION,
+    RECORD_QUESTION_FEEDBACK,
+    RECORD_QUIZ_ANSWER,
+    RECORD_QUIZ_SCORE,
+    RECORD_QUIZ_SCORE_AGGREGATES,
+    Script,
+    execute_pipeline,
+    flatten_mapping,
+    queue_script,
+)
+from src.single_flight import SingleFlight
+from src.streaming import ndjson_response
+from src.write_behind import ScoreWriteBehindBuffer
 
 routes = Blueprint("routes", __name__)
 
@@ -17,34 +72,130 @@ NUM_QUESTIONS_TO_UNLOCK_NEXT = {
 }
 DEFAULT_NUM_QUESTIONS_TO_UNLOCK_NEXT = 5
 
+DEFAULT_LEADERBOARD_SIZE = 10
+MAX_LEADERBOARD_SIZE = 100
+
+DEFAULT_STREAM_PAGE_SIZE = 1000
+MAX_STREAM_PAGE_SIZE = 10000
+
+SCORE_WRITE_BEHIND_ENABLED = os.getenv("SCORE_WRITE_BEHIND_ENABLED", "false").lower() == "true"
+SCORE_WRITE_BEHIND_FLUSH_INTERVAL_SECONDS = float(
+    os.getenv("SCORE_WRITE_BEHIND_FLUSH_INTERVAL_SECONDS", "5")
+)
+SCORE_WRITE_BEHIND_IDLE_EVICT_SECONDS = float(
+    os.getenv("SCORE_WRITE_BEHIND_IDLE_EVICT_SECONDS", "300")
+)
+
+# live sessions expire once they have gone this long without a tick (abandoned games never send a
+# final update), finished games are compacted to a summary that is kept for much longer
+SCORE_SESSION_TTL_SECONDS = int(os.getenv("SCORE_SESSION_TTL_SECONDS", "3600"))
+SCORE_SUMMARY_TTL_SECONDS = int(os.getenv("SCORE_SUMMARY_TTL_SECONDS", str(30 * 24 * 3600)))
+
+PROGRESSION_CACHE_ENABLED = os.getenv("PROGRESSION_CACHE_ENABLED", "true").lower() == "true"
+PROGRESSION_CACHE_MAX_SIZE = int(os.getenv("PROGRESSION_CACHE_MAX_SIZE", "2048"))
+
+METRICS_QUEUE_MAX_SIZE = int(os.getenv("METRICS_QUEUE_MAX_SIZE", "10000"))
+
+# how long a coalesced read result keeps being served after it was computed, 0 to only share
+# results between requests that overlap
+SINGLE_FLIGHT_RESULT_TTL_SECONDS = float(os.getenv("SINGLE_FLIGHT_RESULT_TTL_SECONDS", "1"))
+
+# shared secret the /admin routes want as a bearer token, unset turns them off altogether
+SCOREBOARD_ADMIN_TOKEN = os.getenv("SCOREBOARD_ADMIN_TOKEN", "")
+
+MAX_GAME_SCORE_BATCH_SIZE = 500
+REQUIRED_GAME_SCORE_FIELDS = ("player_name", "title", "game_session_id")
+
 
 @routes.route("/alive", methods=["GET"])
 def alive():
     return jsonify(success=True)
 
 
+# identical full reads (everyone opening the scoreboard at once) share one scan of redis
+HOT_READS = SingleFlight(result_ttl_seconds=SINGLE_FLIGHT_RESULT_TTL_SECONDS)
+
+
 @routes.route("/get_game_scores/", methods=["GET"])
 def get_game_scores():
     redis = get_redis_conn()
 
-    scoreboard = []
-
-    for key in redis.scan_iter(match="scores:*"):
-        score_entry = redis.hgetall(key)
-        scoreboard.append(score_entry)
+    match = namespaced("scores:*")
+    scoreboard = HOT_READS.do(key=match, fn=lambda: list(scan_hashes(redis=redis, match=match)))
 
     return jsonify(scoreboard)
 
 
-@routes.route("/get_quiz_scores/", methods=["GET"])
-def get_quiz_scores():
+def _stream_scores_page(match: str, static_only: bool = False):
+    cursor = request.args.get("cursor", 0, type=int)
+    limit = request.args.get("limit", DEFAULT_STREAM_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_STREAM_PAGE_SIZE))
+
     redis = get_redis_conn()
 
-    scoreboard = []
+    next_cursor, keys = scan_keys_page(redis=redis, match=match, cursor=cursor, limit=limit)
+
+    records = get_hashes(redis=redis, keys=keys)
+    if static_only:
+        records = (record for record in records if record.get("source", "") == "static")
+
+    # a next cursor of 0 means the scan is complete and there are no more pages to fetch
+    return ndjson_response(records=records, headers={"Next-Cursor": str(next_cursor)})
+
+
+@routes.route("/get_game_scores/stream", methods=["GET"])
+def stream_game_scores():
+    return _stream_scores_page(match=namespaced("scores:*"))
+
 
-    for key in redis.scan_iter(match="quiz:*"):
-        score_entry = redis.hgetall(key)
+@routes.route("/get_game_leaderboard/<string:title>", methods=["GET"])
+def get_game_leaderboard(title: str):
+    limit = request.args.get("limit", DEFAULT_LEADERBOARD_SIZE, type=int)
+    limit = max(1, min(limit, MAX_LEADERBOARD_SIZE))
 
+    redis = get_redis_conn()
+
+    # each shard holds the top sessions of its own players, so the top of every shard between them
+    # holds the overall top
+    pipeline = redis.pipeline(transaction=False)
+    for shard in range(AGGREGATE_SHARDS):
+        pipeline.zrevrange(
+            get_game_leaderboard_key(title=title, shard=shard), 0, limit - 1, withscores=True
+        )
+    top_sessions = heapq.nlargest(
+        limit, itertools.chain.from_iterable(pipeline.execute()), key=lambda entry: entry[1]
+    )
+
+    leaderboard = []
+
+    for member, score in top_sessions:
+        # session ids are uuids, so the last colon always splits off the session id even if a
+        # player managed to get a colon into their name
+        player_name, _, game_session_id = member.rpartition(":")
+
+        leaderboard.append(
+            {
+                "player_name": player_name,
+                "title": title,
+                "game_session_id": game_session_id,
+                "current_score": int(score) if score.is_integer() else score,
+            }
+        )
+
+    return jsonify(leaderboard)
+
+
+@routes.route("/leaderboards", methods=["GET"])
+def leaderboards():
+    redis = get_redis_conn()
+
+    return jsonify(HOT_READS.do(key="leaderboards", fn=lambda: get_leaderboards(redis=redis)))
+
+
+def _get_static_quiz_scores(redis: StrictRedis) -> list[dict[str, str]]:
+    scoreboard = []
+
+    for score_entry in scan_hashes(redis=redis, match=namespaced("quiz:*")):
         if score_entry.get("source", "") != "static":
             # for now at least we only "score" (like on the scoreboard) static content
             # -- no ai/dynamic questions count toward score for competition!
@@ -52,19 +203,116 @@ def get_quiz_scores():
 
         scoreboard.append(score_entry)
 
-    return jsonify(scoreboard)
+    return scoreboard
 
 
-@routes.route("/record_game_score/", methods=["POST"])
-def record_game_score():
+@routes.route("/get_quiz_scores/", methods=["GET"])
+def get_quiz_scores():
     redis = get_redis_conn()
 
-    content = request.get_json()
+    scoreboard = HOT_READS.do(
+        key=namespaced("quiz:*"), fn=lambda: _get_static_quiz_scores(redis=redis)
+    )
+
+    return jsonify(scoreboard)
+
+
+@routes.route("/get_quiz_scores/stream", methods=["GET"])
+def stream_quiz_scores():
+    # same as get_quiz_scores, we only care about static content here
+    return _stream_scores_page(match=namespaced("quiz:*"), static_only=True)
+
+
+def parse_current_score(scoreboard_update: dict[str, Any]) -> float | None:
+    if "current_score" not in scoreboard_update:
+        return None
+
+    return float(scoreboard_update["current_score"])
+
+
+def queue_game_score_write(pipeline: Pipeline, scoreboard_update: dict[str, Any]) -> None:
+    queue_game_record_write(pipeline=pipeline, game_record=encode_game_score(scoreboard_update))
+
+
+def queue_game_record_write(pipeline: Pipeline, game_record: dict[str, Any]) -> None:
+    # parse the score before queueing anything so a bad score cant leave a half queued write
+    current_score = parse_current_score(scoreboard_update=game_record)
+
+    is_final = is_final_game_score(game_record=game_record)
+    if is_final:
+        game_record = to_game_summary(game_record=game_record)
+
+    player_name = game_record["player_name"]
+    shard = get_aggregate_shard(player_name=player_name)
+
+    session_key = get_game_score_key(
+        player_name=player_name,
+        title=game_record["title"],
+        game_session_id=game_record["game_session_id"],
+    )
+    # the per title index of session high scores (which saves leaderboard reads from scanning
+    # every session we have ever recorded), the totals and the event stream
+    aggregates_keys = [
+        get_game_leaderboard_key(title=game_record["title"], shard=shard),
+        get_event_stream_key(shard=shard),
+        get_player_game_totals_key(shard=shard),
+        get_player_game_totals_key(shard=shard, title=game_record["title"]),
+        get_game_titles_key(shard=shard),
+    ]
+    args = [
+        get_game_leaderboard_member(
+            player_name=player_name, game_session_id=game_record["game_session_id"]
+        ),
+        "" if current_score is None else current_score,
+        EVENT_STREAM_MAX_LENGTH,
+        SCORE_SUMMARY_TTL_SECONDS if is_final else SCORE_SESSION_TTL_SECONDS,
+        1 if is_final else 0,
+        player_name,
+        game_record["title"],
+        get_event_stream_min_id(),
+        *flatten_mapping(game_record),
+    ]
+
+    if not REDIS_CLUSTER_MODE:
+        queue_script(
+            pipeline=pipeline,
+            script=RECORD_GAME_SCORE,
+            keys=[session_key, *aggregates_keys],
+            args=args,
+        )
+        return
+
+    # the session record and the aggregates are in different slots, so the aggregates follow up
+    # the session write, and not at all if it ignored a late tick
+    def then_record_aggregates(result: Any) -> tuple[Script, list[str], list[Any]] | None:
+        if result == 0:
+            return None
+
+        return RECORD_GAME_SCORE_AGGREGATES, aggregates_keys, args
+
+    queue_script(
+        pipeline=pipeline,
+        script=RECORD_GAME_SESSION,
+        keys=[session_key],
+        args=args,
+        then=then_record_aggregates,
+    )
 
-    current_span = trace.get_current_span()
-    for k, v in content.items():
-        current_span.set_attribute(k, v)
 
+# when enabled, score snapshots are coalesced in memory and flushed to redis in batches rather
+# than written on every tick
+SCORE_WRITE_BUFFER = (
+    ScoreWriteBehindBuffer(
+        writer=queue_game_record_write,
+        flush_interval_seconds=SCORE_WRITE_BEHIND_FLUSH_INTERVAL_SECONDS,
+        idle_evict_seconds=SCORE_WRITE_BEHIND_IDLE_EVICT_SECONDS,
+    )
+    if SCORE_WRITE_BEHIND_ENABLED
+    else None
+)
+
+
+def to_scoreboard_update(content: dict[str, Any]) -> dict[str, Any]:
     scoreboard_update = {}
 
     for k, v in content.items():
@@ -74,34 +322,136 @@ def record_game_score():
             x = v
         scoreboard_update[k] = x
 
-    redis.hmset(
-        f"scores:{scoreboard_update["player_name"]}:"
-        + f"{scoreboard_update["title"]}:"
-        + f"{scoreboard_update["game_session_id"]}",
-        scoreboard_update,
+    return scoreboard_update
+
+
+def record_scoreboard_update(
+    redis: StrictRedis,
+    pipeline: Pipeline,
+    content: dict[str, Any],
+    scoreboard_update: dict[str, Any],
+) -> None:
+    # queues the write on the given pipeline, unless write behind is enabled in which case the
+    # buffer owns when (and if) it actually gets written
+    if SCORE_WRITE_BUFFER is None:
+        queue_game_score_write(pipeline=pipeline, scoreboard_update=scoreboard_update)
+        return
+
+    buffer_scoreboard_update(redis=redis, content=content, scoreboard_update=scoreboard_update)
+
+
+def buffer_scoreboard_update(
+    redis: StrictRedis, content: dict[str, Any], scoreboard_update: dict[str, Any]
+) -> None:
+    # encode (and so fail) now rather than when the buffer gets flushed in the background. the
+    # buffer holds the stored form, so ticks that only changed ephemeral fields dedupe away
+    game_record = encode_game_score(scoreboard_update)
+
+    score_key = get_game_score_key(
+        player_name=game_record["player_name"],
+        title=game_record["title"],
+        game_session_id=game_record["game_session_id"],
     )
 
-    try:
-        metric_factory(name=scoreboard_update["title"]).process(game_data=scoreboard_update)
-    except Exception as e:
-        print(f"ignoring metrics exception: {e}")
+    if content.get("active") is False:
+        SCORE_WRITE_BUFFER.finalize(redis=redis, key=score_key, update=game_record)
+    else:
+        SCORE_WRITE_BUFFER.add(key=score_key, update=game_record)
 
-    return {}
 
+# otel metric updates are applied in the background so request latency doesnt depend on them
+METRICS_QUEUE = MetricsQueue(max_size=METRICS_QUEUE_MAX_SIZE)
 
-def get_question_hash(question: str) -> str:
-    sha256_hash = hashlib.sha256()
-    sha256_hash.update(question.encode("utf-8"))
 
-    return sha256_hash.hexdigest()
+def process_game_metrics(scoreboard_update: dict[str, Any]) -> None:
+    METRICS_QUEUE.submit(game_data=limit_player_name(game_data=scoreboard_update))
 
 
-@routes.route("/record_quiz_score/", methods=["POST"])
-def record_quiz_score():
+@routes.route("/record_game_score/", methods=["POST"])
+def record_game_score():
     redis = get_redis_conn()
 
     content = request.get_json()
 
+    current_span = trace.get_current_span()
+    for k, v in content.items():
+        current_span.set_attribute(k, v)
+
+    scoreboard_update = to_scoreboard_update(content=content)
+
+    pipeline = redis.pipeline(transaction=False)
+    record_scoreboard_update(
+        redis=redis, pipeline=pipeline, content=content, scoreboard_update=scoreboard_update
+    )
+    execute_pipeline(pipeline=pipeline)
+
+    process_game_metrics(scoreboard_update=scoreboard_update)
+
+    return {}
+
+
+@routes.route("/record_game_scores/batch", methods=["POST"])
+def record_game_scores_batch():
+    content = request.get_json()
+
+    if not isinstance(content, list):
+        abort(400, description="expected a list of score events")
+
+    if len(content) > MAX_GAME_SCORE_BATCH_SIZE:
+        abort(400, description=f"batches are limited to {MAX_GAME_SCORE_BATCH_SIZE} score events")
+
+    current_span = trace.get_current_span()
+    current_span.set_attribute("batch_size", len(content))
+
+    redis = get_redis_conn()
+    pipeline = redis.pipeline(transaction=False)
+
+    results = [{"success": True} for _ in content]
+    # index of each event -> (first, last) position of its commands in the pipeline, so we can map
+    # any command failures back to the event that queued them
+    queued_commands = {}
+    latest_per_session = {}
+
+    for index, event in enumerate(content):
+        try:
+            if not isinstance(event, dict):
+                raise ValueError("score event must be an object")
+
+            missing_fields = [field for field in REQUIRED_GAME_SCORE_FIELDS if field not in event]
+            if missing_fields:
+                raise ValueError(f"missing required fields: {missing_fields}")
+
+            scoreboard_update = to_scoreboard_update(content=event)
+
+            command_count = len(pipeline.command_stack)
+            record_scoreboard_update(
+                redis=redis, pipeline=pipeline, content=event, scoreboard_update=scoreboard_update
+            )
+            queued_commands[index] = (command_count, len(pipeline.command_stack))
+        except Exception as e:
+            results[index] = {"success": False, "error": str(e)}
+            continue
+
+        latest_per_session[(scoreboard_update["title"], scoreboard_update["game_session_id"])] = (
+            scoreboard_update
+        )
+
+    command_results = execute_pipeline(pipeline=pipeline, raise_on_error=False)
+
+    for index, (first, last) in queued_commands.items():
+        errors = [str(ret) for ret in command_results[first:last] if isinstance(ret, Exception)]
+        if errors:
+            results[index] = {"success": False, "error": "; ".join(errors)}
+
+    # metrics only care about the latest state of each session, so rather than processing every
+    # tick in the batch we process the last one we got for each session
+    for scoreboard_update in latest_per_session.values():
+        process_game_metrics(scoreboard_update=scoreboard_update)
+
+    return jsonify(results)
+
+
+def to_quiz_update(content: dict[str, Any]) -> dict[str, Any]:
     quiz_update = {}
 
     for k, v in content.items():
@@ -111,15 +461,127 @@ def record_quiz_score():
             x = v
         quiz_update[k] = x
 
-    redis.hmset(
-        f"quiz:{quiz_update["player_name"]}:"
-        + f"{quiz_update["title"]}:"
-        + f"{quiz_update["game_session_id"]}:"
-        + f"{get_question_hash(question=quiz_update["question"])}",
-        quiz_update,
+    # only static content counts toward the competition (see get_quiz_scores), everything else is
+    # recorded but worth nothing toward the player's quiz total
+    quiz_update["answer_score"] = (
+        calculate_quiz_answer_score(
+            attempts=int(quiz_update["attempts"]), time_taken=float(quiz_update["time_taken"])
+        )
+        if quiz_update.get("source", "") == "static"
+        else 0
     )
 
-    return {}
+    return quiz_update
+
+
+def queue_quiz_score_write(pipeline: Pipeline, quiz_update: dict[str, Any]) -> None:
+    player_name = quiz_update["player_name"]
+    shard = get_aggregate_shard(player_name=player_name)
+
+    answer_keys = [
+        get_quiz_key(
+            player_name=player_name,
+            title=quiz_update["title"],
+            game_session_id=quiz_update["game_session_id"],
+            question=quiz_update["question"],
+        ),
+        get_player_seen_questions_key(player_name=player_name, module=quiz_update["title"]),
+        get_player_progression_key(player_name=player_name),
+    ]
+    aggregates_keys = [
+        get_event_stream_key(shard=shard),
+        get_player_quiz_totals_key(shard=shard),
+        get_player_quiz_totals_key(shard=shard, title=quiz_update["title"]),
+    ]
+    args = [
+        quiz_update["question"],
+        quiz_update["title"],
+        PROGRESSION_INVALIDATION_CHANNEL,
+        player_name,
+        EVENT_STREAM_MAX_LENGTH,
+        quiz_update["answer_score"],
+        "",
+        get_event_stream_min_id(),
+        *flatten_mapping(quiz_update),
+    ]
+
+    # question is always set on a quiz record, so if the script managed to set it this is the
+    # first time we've seen this record and it counts toward the player's progression; the
+    # script returns whether that was the case along with the progression counters it left behind
+    if not REDIS_CLUSTER_MODE:
+        queue_script(
+            pipeline=pipeline,
+            script=RECORD_QUIZ_SCORE,
+            keys=[*answer_keys, *aggregates_keys],
+            args=args,
+        )
+        return
+
+    # the answer and the aggregates are in different slots, so the aggregates follow up with the
+    # answer score the record held before this write
+    def then_record_aggregates(result: Any) -> tuple[Script, list[str], list[Any]]:
+        _, _, previous_answer_score = result
+        return (
+            RECORD_QUIZ_SCORE_AGGREGATES,
+            aggregates_keys,
+            [*args[:6], previous_answer_score, *args[7:]],
+        )
+
+    queue_script(
+        pipeline=pipeline,
+        script=RECORD_QUIZ_ANSWER,
+        keys=answer_keys,
+        args=args,
+        then=then_record_aggregates,
+    )
+
+
+@routes.route("/record_quiz_score/", methods=["POST"])
+def record_quiz_score():
+    redis = get_redis_conn()
+
+    quiz_update = to_quiz_update(content=request.get_json())
+
+    pipeline = redis.pipeline(transaction=False)
+    queue_quiz_score_write(pipeline=pipeline, quiz_update=quiz_update)
+    is_new_record, question_counts, _ = execute_pipeline(pipeline=pipeline)[0]
+
+    if is_new_record:
+        invalidate_local_progression(player_name=quiz_update["player_name"])
+
+    return jsonify(
+        to_quiz_answer_response(
+            module=quiz_update["title"],
+            is_new_record=is_new_record,
+            question_counts=question_counts,
+        )
+    )
+
+
+def to_quiz_answer_response(
+    module: str, is_new_record: int, question_counts: list[str]
+) -> dict[str, Any]:
+    # hands the player's progression back with the write (and what this answer changed about it)
+    # so the cabinet doesnt need a second request to find out what it unlocked
+    question_counts = dict(zip(question_counts[::2], question_counts[1::2]))
+
+    previous_question_counts = dict(question_counts)
+    if is_new_record:
+        previous_question_counts[module] = int(question_counts[module]) - 1
+
+    previous_progression = build_player_progression(question_counts=previous_question_counts)
+    progression = build_player_progression(question_counts=question_counts)
+
+    transitions = []
+    for kind in ("level_state", "game_versions"):
+        for game, state in progression[kind].items():
+            previous_state = previous_progression[kind].get(game)
+            if previous_state != state:
+                transitions.append(
+                    {"kind": kind, "game": game, "from": previous_state, "to": state}
+                )
+
+    return {"progression": progression, "transitions": transitions}
 
 
 @routes.route("/player_seen_questions/<string:module>", methods=["GET"])
@@ -130,12 +592,25 @@ def get_player_seen_questions(module: str):
 
     redis = get_redis_conn()
 
-    seen_questions = []
+    seen_questions = redis.smembers(
+        get_player_seen_questions_key(player_name=player_name, module=module)
+    )
+
+    return jsonify(list(seen_questions))
+
+
+# progression is polled constantly by every cabinet but only changes when a player answers a
+# question, so it is cached per replica and invalidated over pubsub by the quiz writes
+PROGRESSION_CACHE = (
+    ProgressionCache(max_size=PROGRESSION_CACHE_MAX_SIZE) if PROGRESSION_CACHE_ENABLED else None
+)
 
-    for key in redis.scan_iter(match=f"quiz:{player_name}:{module}:*"):
-        seen_questions.append(redis.hget(key, "question"))
 
-    return jsonify(seen_questions)
+def invalidate_local_progression(player_name: str) -> None:
+    # the pubsub message will get here too, but dont make this replica wait on it to serve the
+    # player their own update
+    if PROGRESSION_CACHE is not None:
+        PROGRESSION_CACHE.invalidate(player_name=player_name)
 
 
 @routes.route("/player_progression", methods=["GET"])
@@ -144,8 +619,27 @@ def get_player_progression():
     if not player_name:
         raise Exception("No Player Name provided")
 
-    redis = get_redis_conn()
+    if PROGRESSION_CACHE is None:
+        return jsonify(compute_player_progression(redis=get_redis_conn(), player_name=player_name))
+
+    progression = PROGRESSION_CACHE.get(player_name=player_name)
+    if progression is None:
+        generation = PROGRESSION_CACHE.generation()
+        progression = compute_player_progression(redis=get_redis_conn(), player_name=player_name)
+        PROGRESSION_CACHE.put(
+            player_name=player_name, progression=progression, generation=generation
+        )
+
+    return jsonify(progression)
+
 
+def compute_player_progression(redis: StrictRedis, player_name: str) -> dict[str, Any]:
+    return build_player_progression(
+        question_counts=redis.hgetall(get_player_progression_key(player_name=player_name))
+    )
+
+
+def build_player_progression(question_counts: dict[str, str]) -> dict[str, Any]:
     progression = {
         "level_state": {
             "imvaders": "unlocked",
@@ -172,9 +666,7 @@ def get_player_progression():
             module, DEFAULT_NUM_QUESTIONS_TO_UNLOCK_NEXT
         )
 
-        question_keys = redis.scan_iter(match=f"quiz:{player_name}:{module}:*")
-
-        question_count = sum(1 for _ in question_keys)
+        question_count = int(question_counts.get(module, 0))
 
         if question_count >= num_questions_to_unlock_next:
             progression["level_state"][modules[index + 1]] = "unlocked"
@@ -193,7 +685,7 @@ def get_player_progression():
         progression["level_state"]["floppybird"] = "unlocked"
         progression["level_state"]["zelda"] = "unlocked"
 
-    return jsonify(progression)
+    return progression
 
 
 @routes.route("/reset_player_quiz_scores", methods=["POST"])
@@ -204,8 +696,35 @@ def reset_player_quiz_scores():
 
     redis = get_redis_conn()
 
-    for key in redis.scan_iter(f"quiz:{player_name}:*:*"):
-        redis.delete(key)
+    unlink_matching(redis=redis, match=get_player_quiz_pattern(player_name=player_name))
+
+    # every module a player has answered for has a progression counter, so that tells us which
+    # seen question sets there are to clean up
+    progression_key = get_player_progression_key(player_name=player_name)
+
+    modules = redis.hkeys(progression_key)
+
+    pipeline = redis.pipeline(transaction=False)
+    pipeline.unlink(
+        progression_key,
+        *[
+            get_player_seen_questions_key(player_name=player_name, module=module)
+            for module in modules
+        ],
+    )
+    shard = get_aggregate_shard(player_name=player_name)
+    for totals_key in [
+        get_player_quiz_totals_key(shard=shard),
+        *[get_player_quiz_totals_key(shard=shard, title=module) for module in modules],
+    ]:
+        pipeline.zrem(totals_key, player_name)
+    pipeline.execute()
+
+    # or a replay of the event stream would mark the questions seen again
+    start_player_quiz_events_removal(player_name=player_name)
+
+    publish_progression_invalidation(redis=redis, player_name=player_name)
+    invalidate_local_progression(player_name=player_name)
 
     return {}
 
@@ -227,10 +746,7 @@ def blackhole_sun():
             x = v
         scoreboard_update[k] = x
 
-    try:
-        metric_factory(name=scoreboard_update["title"]).process(game_data=scoreboard_update)
-    except Exception as e:
-        print(f"ignoring metrics exception: {e}")
+    process_game_metrics(scoreboard_update=scoreboard_update)
 
     errors = [
         (400, "Bad Request: Cosmic interference detected."),
@@ -244,6 +760,49 @@ def blackhole_sun():
     return jsonify(abort(code, description=message))
 
 
+def require_admin_token() -> None:
+    if not SCOREBOARD_ADMIN_TOKEN:
+        abort(403, description="admin routes are disabled, no admin token is configured")
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    # constant time compare so the token cant be guessed a character at a time
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode("utf-8"), SCOREBOARD_ADMIN_TOKEN.encode("utf-8")
+    ):
+        abort(401, description="missing or invalid admin token")
+
+
+@routes.route("/admin/purge", methods=["POST"])
+def purge():
+    require_admin_token()
+
+    content = request.get_json()
+
+    redis = get_redis_conn()
+
+    try:
+        purge_id = start_purge(
+            redis=redis, scope=content.get("scope", ""), value=content.get("value", "")
+        )
+    except ValueError as e:
+        abort(400, description=str(e))
+
+    return jsonify(purge_id=purge_id), 202
+
+
+@routes.route("/admin/purge/<string:purge_id>", methods=["GET"])
+def purge_status(purge_id: str):
+    require_admin_token()
+
+    redis = get_redis_conn()
+
+    status = get_purge_status(redis=redis, purge_id=purge_id)
+    if not status:
+        abort(404, description=f"no purge with id {purge_id}")
+
+    return jsonify(status)
+
+
 @routes.route("/record_question_thumbs_up_down", methods=["POST"])
 def record_question_thumbs_up_down():
     player_name = request.headers.get("Player-Name")
@@ -260,11 +819,19 @@ def record_question_thumbs_up_down():
 
     redis = get_redis_conn()
 
-    redis.hsetnx(f"feedback:{question_hash}", "question", question)
-
+    counter = ""
     if content.get("is_good", None) is True:
-        redis.hincrby(f"feedback:{question_hash}", "count_positive", 1)
+        counter = "count_positive"
     elif content.get("is_bad", None) is True:
-        redis.hincrby(f"feedback:{question_hash}", "count_positive", 1)
+        counter = "count_positive"
+
+    pipeline = redis.pipeline(transaction=False)
+    queue_script(
+        pipeline=pipeline,
+        script=RECORD_QUESTION_FEEDBACK,
+        keys=[get_feedback_key(question_hash=question_hash)],
+        args=[question, counter],
+    )
+    execute_pipeline(pipeline=pipeline)
 
     return {}
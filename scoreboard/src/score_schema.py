@@ -0,0 +1,72 @@
+from collections.abc import Callable
+from typing import Any
+
+# games post their whole state every tick, but only a handful of those fields are ever read back
+# out of redis (leaderboards, the portal, purges). each title declares which fields we store and
+# what type they are; anything else (position, projectiles, ...) is only used for metrics and
+# never hits redis. values are stored in their smallest form so the session hash stays small
+# enough for redis to keep it listpack encoded with integer encoded values.
+
+
+def _encode_str(value: Any) -> str:
+    return str(value)
+
+
+def _encode_int(value: Any) -> int:
+    # json numbers can come through as floats (or strings of floats) even when they are whole
+    return int(float(value))
+
+
+def _encode_bool(value: Any) -> int:
+    # to_scoreboard_update has already turned json booleans into "True"/"False"
+    if isinstance(value, str):
+        return 1 if value.lower() in ("true", "1") else 0
+
+    return 1 if value else 0
+
+
+FieldEncoder = Callable[[Any], Any]
+
+_SESSION_FIELDS: dict[str, FieldEncoder] = {
+    "game_session_id": _encode_str,
+    "title": _encode_str,
+    "player_name": _encode_str,
+    "player_id": _encode_str,
+    "version": _encode_str,
+    "active": _encode_bool,
+    "current_score": _encode_int,
+}
+
+GAME_SCORE_SCHEMAS: dict[str, dict[str, FieldEncoder]] = {
+    "imvaders": {
+        **_SESSION_FIELDS,
+        "level": _encode_int,
+        "lives_remaining": _encode_int,
+        "duration": _encode_int,
+    },
+    "logger": _SESSION_FIELDS,
+    "bughunt": _SESSION_FIELDS,
+}
+
+
+def encode_game_score(scoreboard_update: dict[str, Any]) -> dict[str, Any]:
+    schema = GAME_SCORE_SCHEMAS.get(scoreboard_update.get("title"), _SESSION_FIELDS)
+
+    try:
+        return {
+            field: encode(scoreboard_update[field])
+            for field, encode in schema.items()
+            if field in scoreboard_update
+        }
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"invalid game score field: {e}") from e
+
+
+def is_final_game_score(game_record: dict[str, Any]) -> bool:
+    return game_record.get("active") == 0
+
+
+def to_game_summary(game_record: dict[str, Any]) -> dict[str, Any]:
+    # once a game is over only what identifies the session and its final score is kept around,
+    # whatever the title tracks while the game is being played is dropped
+    return {field: game_record[field] for field in _SESSION_FIELDS if field in game_record}
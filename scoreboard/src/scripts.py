@@ -0,0 +1,319 @@
+import hashlib
+import weakref
+from collections.abc import Callable
+from typing import Any
+
+from redis.asyncio.client import Pipeline as AsyncPipeline
+from redis.client import Pipeline
+from redis.exceptions import NoScriptError
+
+# writes that touch more than one structure (the record itself plus whatever we index/count off of
+# it) run as lua scripts so the write and all of its secondary updates land atomically in a single
+# round trip. scripts are called by sha; redis only forgets them on restart/failover/script flush,
+# in which case the commands that got NOSCRIPT are retried once as an EVAL of the source, which
+# also caches the script again on whichever node (in cluster mode) the command went to.
+
+
+class Script:
+    def __init__(self, name: str, source: str) -> None:
+        self.name = name
+        self.source = source
+        self.sha = hashlib.sha1(source.encode()).hexdigest()
+
+
+# the game and quiz writes each come as one script doing everything on a single redis, and as two
+# halves for cluster mode where the player's keys and the aggregate keys live in different slots
+# (see keys.py): the player half runs first and its result decides whether and how the aggregates
+# half runs (see queue_script's then). the halves are the same lua either way
+
+# KEYS: session score hash
+_GAME_SESSION_LUA = """
+local is_final = ARGV[5] == '1'
+if not is_final and redis.call('HGET', KEYS[1], 'active') == '0' then
+    -- a late tick must not turn the final summary back into (short lived) live state
+    return 0
+end
+if is_final then
+    -- the summary replaces the tick state rather than being merged into it
+    redis.call('DEL', KEYS[1])
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 9))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+"""
+
+# the last five KEYS: title leaderboard, event stream, player game totals, player game totals for
+# the title, titles set
+_GAME_AGGREGATES_LUA = """
+local leaderboard_key, stream_key, totals_key, title_totals_key, titles_key =
+    unpack(KEYS, #KEYS - 4)
+if ARGV[2] ~= '' then
+    -- the titles that have a leaderboard, so the boards can be read without scanning for them
+    redis.call('SADD', titles_key, ARGV[7])
+    -- the running totals are the sum of each session's best score, so move them by however much
+    -- this session's best went up. the best comes from the leaderboard rather than the session
+    -- hash, which expires -- a session id that posts again after that would be counted twice
+    local previous_score = tonumber(redis.call('ZSCORE', leaderboard_key, ARGV[1])) or 0
+    -- gt means a late/out of order tick can never lower a session's best score
+    redis.call('ZADD', leaderboard_key, 'GT', ARGV[2], ARGV[1])
+    local delta = tonumber(ARGV[2]) - previous_score
+    if delta > 0 then
+        redis.call('ZINCRBY', totals_key, delta, ARGV[6])
+        redis.call('ZINCRBY', title_totals_key, delta, ARGV[6])
+    end
+end
+redis.call('XADD', stream_key, 'MINID', '~', ARGV[8], '*', 'type', 'game_score', unpack(ARGV, 9))
+redis.call('XTRIM', stream_key, 'MAXLEN', '~', ARGV[3])
+"""
+
+# ARGV (all three game scripts): leaderboard member, score (empty if the update has none), event
+#       stream max length, ttl seconds, "1" if this is the final (game over) record, player name,
+#       title, oldest event stream id to keep, field/value pairs...
+
+# KEYS: session score hash, then the aggregates keys
+# returns 0 if the session was already finalized and the update was ignored, 1 otherwise
+RECORD_GAME_SCORE = Script(
+    name="record_game_score",
+    source=_GAME_SESSION_LUA + _GAME_AGGREGATES_LUA + "return 1\n",
+)
+
+# KEYS: session score hash
+# returns 0 if the session was already finalized and the update was ignored, 1 otherwise
+RECORD_GAME_SESSION = Script(
+    name="record_game_session",
+    source=_GAME_SESSION_LUA + "return 1\n",
+)
+
+# KEYS: the aggregates keys
+RECORD_GAME_SCORE_AGGREGATES = Script(
+    name="record_game_score_aggregates",
+    source=_GAME_AGGREGATES_LUA + "return 1\n",
+)
+
+# KEYS: quiz record hash, seen questions set, progression counters hash
+_QUIZ_ANSWER_LUA = """
+local previous_answer_score = redis.call('HGET', KEYS[1], 'answer_score') or ''
+local is_new_record = redis.call('HSETNX', KEYS[1], 'question', ARGV[1])
+redis.call('HSET', KEYS[1], unpack(ARGV, 9))
+redis.call('SADD', KEYS[2], ARGV[1])
+if is_new_record == 1 then
+    redis.call('HINCRBY', KEYS[3], ARGV[2], 1)
+    redis.call('PUBLISH', ARGV[3], ARGV[4])
+end
+"""
+
+# the last three KEYS: event stream, player quiz totals, player quiz totals for the module
+_QUIZ_AGGREGATES_LUA = """
+local stream_key, totals_key, title_totals_key = unpack(KEYS, #KEYS - 2)
+local delta = tonumber(ARGV[6]) - (tonumber(previous_answer_score) or 0)
+if delta ~= 0 then
+    redis.call('ZINCRBY', totals_key, delta, ARGV[4])
+    redis.call('ZINCRBY', title_totals_key, delta, ARGV[4])
+end
+redis.call('XADD', stream_key, 'MINID', '~', ARGV[8], '*', 'type', 'quiz_score', unpack(ARGV, 9))
+redis.call('XTRIM', stream_key, 'MAXLEN', '~', ARGV[5])
+"""
+
+_QUIZ_ANSWER_RETURN_LUA = (
+    "return {is_new_record, redis.call('HGETALL', KEYS[3]), previous_answer_score}\n"
+)
+
+# ARGV (all three quiz scripts): question, module, invalidation channel, player name, event stream
+#       max length, answer score, the record's previous answer score (only read by
+#       RECORD_QUIZ_SCORE_AGGREGATES), oldest event stream id to keep, field/value pairs
+#       (including the answer score)...
+
+# KEYS: quiz record hash, seen questions set, progression counters hash, then the aggregates keys
+# returns {1 if this is the first time we have seen the record (0 otherwise), the player's
+# progression counters after the write as field/value pairs, the record's previous answer score}
+RECORD_QUIZ_SCORE = Script(
+    name="record_quiz_score",
+    source=_QUIZ_ANSWER_LUA + _QUIZ_AGGREGATES_LUA + _QUIZ_ANSWER_RETURN_LUA,
+)
+
+# KEYS: quiz record hash, seen questions set, progression counters hash
+# returns the same as RECORD_QUIZ_SCORE
+RECORD_QUIZ_ANSWER = Script(
+    name="record_quiz_answer",
+    source=_QUIZ_ANSWER_LUA + _QUIZ_ANSWER_RETURN_LUA,
+)
+
+# KEYS: the aggregates keys
+RECORD_QUIZ_SCORE_AGGREGATES = Script(
+    name="record_quiz_score_aggregates",
+    source="local previous_answer_score = ARGV[7]\n" + _QUIZ_AGGREGATES_LUA + "return 1\n",
+)
+
+# KEYS: question feedback hash
+# ARGV: question, counter field to bump (empty to only record the question)
+RECORD_QUESTION_FEEDBACK = Script(
+    name="record_question_feedback",
+    source="""
+redis.call('HSETNX', KEYS[1], 'question', ARGV[1])
+if ARGV[2] ~= '' then
+    redis.call('HINCRBY', KEYS[1], ARGV[2], 1)
+end
+return 1
+""",
+)
+
+_SCRIPTS_BY_SHA = {
+    script.sha: script
+    for script in (
+        RECORD_GAME_SCORE,
+        RECORD_GAME_SESSION,
+        RECORD_GAME_SCORE_AGGREGATES,
+        RECORD_QUIZ_SCORE,
+        RECORD_QUIZ_ANSWER,
+        RECORD_QUIZ_SCORE_AGGREGATES,
+        RECORD_QUESTION_FEEDBACK,
+    )
+}
+
+
+def flatten_mapping(mapping: dict[str, Any]) -> list[Any]:
+    return [item for pair in mapping.items() for item in pair]
+
+
+# a script queued with a then depends on the result of another script that could not run in the
+# same one (in cluster mode their keys live in different slots). once the pipeline has run, then
+# gets the script's result and returns the script call to follow it up with, or None to skip the
+# follow up. follow ups all go out together in one more round trip, and a follow up that fails is
+# reported in place of the result of the script that queued it.
+ScriptCall = tuple[Script, list[str], list[Any]]
+FollowUp = Callable[[Any], ScriptCall | None]
+
+_follow_ups: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def queue_script(
+    pipeline: Pipeline | AsyncPipeline,
+    script: Script,
+    keys: list[str],
+    args: list[Any],
+    then: FollowUp | None = None,
+) -> None:
+    if then is not None:
+        _follow_ups.setdefault(pipeline, {})[len(pipeline)] = then
+
+    pipeline.evalsha(script.sha, len(keys), *keys, *args)
+
+
+def _queued_commands(pipeline: Pipeline | AsyncPipeline) -> list[tuple[tuple, dict]]:
+    # plain pipelines queue (args, options) tuples, cluster pipelines queue command objects (which
+    # the async one keeps to itself)
+    command_stack = getattr(pipeline, "command_stack", None)
+    if command_stack is None:
+        return [(command.args, command.kwargs) for command in pipeline._command_stack]
+
+    return [
+        command if isinstance(command, tuple) else (command.args, command.options)
+        for command in command_stack
+    ]
+
+
+def _queue_script_retries(
+    pipeline: Pipeline | AsyncPipeline, queued_commands: list, results: list
+) -> list[int]:
+    missing = [index for index, result in enumerate(results) if isinstance(result, NoScriptError)]
+
+    for index in missing:
+        (_, sha, *keys_and_args), options = queued_commands[index]
+        pipeline.execute_command("EVAL", _SCRIPTS_BY_SHA[sha].source, *keys_and_args, **options)
+
+    return missing
+
+
+def _merge_script_retries(results: list, missing: list[int], retry_results: list) -> None:
+    for index, result in zip(missing, retry_results):
+        results[index] = result
+
+
+def _queue_follow_ups(
+    pipeline: Pipeline | AsyncPipeline, follow_ups: dict[int, FollowUp], results: list
+) -> list[int]:
+    followed_up = []
+
+    for index, then in follow_ups.items():
+        if isinstance(results[index], Exception):
+            continue
+
+        script_call = then(results[index])
+        if script_call is None:
+            continue
+
+        script, keys, args = script_call
+        queue_script(pipeline=pipeline, script=script, keys=keys, args=args)
+        followed_up.append(index)
+
+    return followed_up
+
+
+def _merge_follow_ups(results: list, followed_up: list[int], follow_up_results: list) -> None:
+    for index, result in zip(followed_up, follow_up_results):
+        if isinstance(result, Exception):
+            results[index] = result
+
+
+def _raise_on_error(results: list) -> None:
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+
+def execute_pipeline(pipeline: Pipeline, raise_on_error: bool = True) -> list:
+    follow_ups = _follow_ups.pop(pipeline, {})
+    # execute is what resets the command stack, so hang on to it to know what to retry
+    queued_commands = _queued_commands(pipeline=pipeline)
+    results = pipeline.execute(raise_on_error=False)
+
+    missing = _queue_script_retries(
+        pipeline=pipeline, queued_commands=queued_commands, results=results
+    )
+    if missing:
+        _merge_script_retries(
+            results=results,
+            missing=missing,
+            retry_results=pipeline.execute(raise_on_error=False),
+        )
+
+    followed_up = _queue_follow_ups(pipeline=pipeline, follow_ups=follow_ups, results=results)
+    if followed_up:
+        _merge_follow_ups(
+            results=results,
+            followed_up=followed_up,
+            follow_up_results=execute_pipeline(pipeline=pipeline, raise_on_error=False),
+        )
+
+    if raise_on_error:
+        _raise_on_error(results=results)
+
+    return results
+
+
+async def execute_pipeline_async(pipeline: AsyncPipeline, raise_on_error: bool = True) -> list:
+    follow_ups = _follow_ups.pop(pipeline, {})
+    queued_commands = _queued_commands(pipeline=pipeline)
+    results = await pipeline.execute(raise_on_error=False)
+
+    missing = _queue_script_retries(
+        pipeline=pipeline, queued_commands=queued_commands, results=results
+    )
+    if missing:
+        _merge_script_retries(
+            results=results,
+            missing=missing,
+            retry_results=await pipeline.execute(raise_on_error=False),
+        )
+
+    followed_up = _queue_follow_ups(pipeline=pipeline, follow_ups=follow_ups, results=results)
+    if followed_up:
+        _merge_follow_ups(
+            results=results,
+            followed_up=followed_up,
+            follow_up_results=await execute_pipeline_async(pipeline=pipeline, raise_on_error=False),
+        )
+
+    if raise_on_error:
+        _raise_on_error(results=results)
+
+    return results
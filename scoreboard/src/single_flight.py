@@ -0,0 +1,74 @@
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from opentelemetry import metrics
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Exception | None = None
+
+
+class SingleFlight:
+    # concurrent calls for the same key share one in flight computation (and its result or error)
+    # rather than each running it, e.g. a room full of people opening the scoreboard at once
+    # turns into a single scan of redis. optionally the result is also reused for a short while
+    # after it completes, which covers the requests that arrive just after the computation ended.
+    # results are handed to every caller as is, so callers must not mutate them.
+    def __init__(self, result_ttl_seconds: float) -> None:
+        self._result_ttl_seconds = result_ttl_seconds
+
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+        self._results: dict[str, tuple[float, Any]] = {}
+
+        self._shared_counter = metrics.get_meter("scoreboard.single_flight").create_counter(
+            name="arcade.single_flight.shared",
+            description="calls served by a computation another call started (or just finished)",
+        )
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            expires_at, result = self._results.get(key, (0.0, None))
+            cached = expires_at > time.monotonic()
+
+            call = None if cached else self._calls.get(key)
+            leader = not cached and call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            self._shared_counter.add(amount=1, attributes={"key": key})
+
+        if cached:
+            return result
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                if call.error is None and self._result_ttl_seconds > 0:
+                    self._results[key] = (
+                        time.monotonic() + self._result_ttl_seconds,
+                        call.result,
+                    )
+
+            call.done.set()
+
+        return call.result
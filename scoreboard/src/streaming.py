@@ -0,0 +1,42 @@
+import json
+import zlib
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from flask import Response, request, stream_with_context
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+GZIP_LEVEL = 6
+
+
+def _ndjson_lines(records: Iterable[dict[str, Any]]) -> Iterator[bytes]:
+    for record in records:
+        yield json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _gzipped(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+
+    yield compressor.flush()
+
+
+def ndjson_response(records: Iterable[dict[str, Any]], headers: dict[str, str]) -> Response:
+    # records is consumed lazily as the body is written out, so nothing here ever holds the whole
+    # result set; stream_with_context keeps g (and so the redis conn) alive while we stream
+    body = _ndjson_lines(records=records)
+    headers = {**headers, "Vary": "Accept-Encoding"}
+
+    if "gzip" in request.accept_encodings:
+        body = _gzipped(chunks=body)
+        headers["Content-Encoding"] = "gzip"
+
+    return Response(
+        stream_with_context(body),
+        mimetype="application/x-ndjson",
+        headers=headers,
+    )
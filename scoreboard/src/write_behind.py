@@ -0,0 +1,118 @@
+import atexit
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from redis import StrictRedis
+from redis.client import Pipeline
+
+from src.cache import new_redis_conn
+from src.scripts import execute_pipeline
+
+
+class ScoreWriteBehindBuffer:
+    # holds the latest snapshot per game session in memory and writes all the sessions that changed
+    # since the last flush to redis in one pipeline every flush interval. games post their full
+    # state every couple seconds, so most of those writes are either superseded before the next
+    # flush or identical to what we already stored.
+    def __init__(
+        self,
+        writer: Callable[[Pipeline, dict[str, Any]], None],
+        flush_interval_seconds: float,
+        idle_evict_seconds: float,
+    ) -> None:
+        self._writer = writer
+        self._flush_interval_seconds = flush_interval_seconds
+        self._idle_evict_seconds = idle_evict_seconds
+
+        # _lock guards the dicts, _flush_lock serializes writes to redis so a flush of an older
+        # snapshot can never land after a newer one
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        self._dirty: dict[str, dict[str, Any]] = {}
+        self._last_written: dict[str, dict[str, Any]] = {}
+        self._last_seen: dict[str, float] = {}
+
+        self._redis: StrictRedis | None = None
+        self._thread: threading.Thread | None = None
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._redis = new_redis_conn()
+        self._thread = threading.Thread(target=self._run, name="score-write-behind", daemon=True)
+        self._thread.start()
+
+        atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self._flush_interval_seconds)
+
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"ignoring score write behind flush exception: {e}")
+
+    def add(self, key: str, update: dict[str, Any]) -> None:
+        with self._lock:
+            self._ensure_started()
+
+            self._last_seen[key] = time.monotonic()
+
+            if update == self._dirty.get(key, self._last_written.get(key)):
+                # nothing changed since the last tick, no reason to write it again
+                return
+
+            self._dirty[key] = update
+
+    def finalize(self, redis: StrictRedis, key: str, update: dict[str, Any]) -> None:
+        # the session is over -- write its final state right away (rather than waiting on the
+        # next flush) and forget about it
+        with self._flush_lock:
+            with self._lock:
+                self._dirty.pop(key, None)
+                self._last_written.pop(key, None)
+                self._last_seen.pop(key, None)
+
+            pipeline = redis.pipeline(transaction=False)
+            self._writer(pipeline, update)
+            execute_pipeline(pipeline=pipeline)
+
+    def _evict_idle(self) -> None:
+        # abandoned sessions never send a final (inactive) update, so age them out eventually
+        cutoff = time.monotonic() - self._idle_evict_seconds
+
+        for key, last_seen in list(self._last_seen.items()):
+            if last_seen < cutoff and key not in self._dirty:
+                self._last_written.pop(key, None)
+                self._last_seen.pop(key, None)
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._dirty = self._dirty, {}
+                self._evict_idle()
+
+            if not batch:
+                return
+
+            pipeline = self._redis.pipeline(transaction=False)
+            for update in batch.values():
+                self._writer(pipeline, update)
+
+            try:
+                execute_pipeline(pipeline=pipeline)
+            except Exception:
+                with self._lock:
+                    # put back whatever didnt get superseded while we were trying to write
+                    for key, update in batch.items():
+                        self._dirty.setdefault(key, update)
+
+                raise
+
+            with self._lock:
+                self._last_written.update(batch)